@@ -0,0 +1,37 @@
+"""
+Import point for the drf_yasg annotations used by the views.
+
+With ``API_DOCS["ENABLED"]`` these are drf_yasg's own ``openapi`` and
+``swagger_auto_schema``. Otherwise drf_yasg is never imported: the
+decorator returns the view unchanged and ``openapi`` is an inert stand-in,
+so a production worker skips drf_yasg's import tree and the schema objects
+it would build at import time. The prebuilt schema (``config.openapi``) is
+served either way.
+"""
+from importlib.util import find_spec
+
+from django.conf import settings
+
+
+def docs_enabled():
+    return settings.API_DOCS["ENABLED"] and find_spec("drf_yasg") is not None
+
+
+class _Inert:
+    """Stands in for ``drf_yasg.openapi``: every attribute and call returns itself."""
+
+    def __getattr__(self, name):
+        return self
+
+    def __call__(self, *args, **kwargs):
+        return self
+
+
+if docs_enabled():
+    from drf_yasg import openapi
+    from drf_yasg.utils import swagger_auto_schema
+else:
+    openapi = _Inert()
+
+    def swagger_auto_schema(*args, **kwargs):
+        return lambda view: view
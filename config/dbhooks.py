@@ -0,0 +1,51 @@
+"""
+Request-scoped database execute hooks that work under WSGI and ASGI.
+
+Django connections are per thread, and ``connection.execute_wrapper()``
+only wraps the connection of the thread that enters it. Under ASGI the
+middleware runs on the event loop while sync views and the ORM run on an
+executor thread, so a wrapper installed by the middleware never sees the
+view's queries. Instead one dispatcher is installed on every connection
+when it is created, and it forwards each query to the hooks bound with
+``hooked()`` in the current context; ``sync_to_async`` copies the context
+into the executor thread, so the hooks follow the request wherever it runs.
+"""
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+_hooks = ContextVar("db_execute_hooks", default=())
+
+
+def _dispatch(execute, sql, params, many, context):
+    hooks = _hooks.get()
+    for hook in reversed(hooks):
+        execute = functools.partial(hook, execute)
+    return execute(sql, params, many, context)
+
+
+def install(connection):
+    if _dispatch not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_dispatch)
+
+
+@receiver(connection_created)
+def _install_on_connect(sender, connection, **kwargs):
+    install(connection)
+
+
+@contextmanager
+def hooked(*hooks):
+    """Pass every query run in this context, on any thread, through ``hooks`` (execute wrappers)."""
+    # connections this thread opened before the receiver was connected
+    for alias in connections:
+        install(connections[alias])
+    token = _hooks.set(_hooks.get() + hooks)
+    try:
+        yield
+    finally:
+        _hooks.reset(token)
@@ -0,0 +1,302 @@
+"""
+Per-endpoint request metrics with a Prometheus text exposition at /metrics.
+
+``MetricsMiddleware`` records, per view action (``ProductViewSet.list``,
+``OrderViewSet.create``, ``LoginView.post`` ...), HTTP method and status:
+
+* request latency (histogram),
+* DB query count (histogram) and DB time,
+* time spent in the view outside the database (serializers dominate this),
+* response rendering time,
+* response size (histogram).
+
+Samples are aggregated in process under a lock. With several worker
+processes (gunicorn), set ``METRICS["MULTIPROCESS_DIR"]`` to a directory
+shared by the workers: each one periodically writes its snapshot there
+atomically and /metrics sums the snapshots of every worker, including
+those that have exited, so counters stay monotonic.
+"""
+import copy
+import json
+import os
+import tempfile
+import threading
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+from config import dbhooks
+from config.options import merged
+
+DEFAULTS = {
+    "ENABLED": True,
+    "MULTIPROCESS_DIR": None,
+    "FLUSH_INTERVAL": 5.0,
+    # if set, /metrics requires "Authorization: Bearer <TOKEN>"; if not, only
+    # loopback addresses and INTERNAL_IPS may scrape it
+    "TOKEN": None,
+}
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+HISTOGRAMS = {
+    # name: (help, buckets)
+    "http_request_duration_seconds": ("Request latency", LATENCY_BUCKETS),
+    "http_request_db_queries": ("DB queries per request", QUERY_BUCKETS),
+    "http_response_size_bytes": ("Response body size", SIZE_BUCKETS),
+}
+SUMS = {
+    "http_request_db_seconds_total": "Time spent in DB queries",
+    "http_request_view_seconds_total": "Time spent in the view outside the DB (mostly serializers)",
+    "http_request_render_seconds_total": "Time spent rendering responses",
+}
+LABELS = ("view", "method", "status")
+
+
+def options():
+    return merged("METRICS", DEFAULTS)
+
+
+def _bucket_index(buckets, value):
+    for i, bound in enumerate(buckets):
+        if value <= bound:
+            return i
+    return len(buckets)  # +Inf
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}
+        self._last_flush = time.monotonic()
+
+    def observe(self, labels, duration, queries, db_seconds, view_seconds, render_seconds, size):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = {
+                    **{name: {"buckets": [0] * (len(b) + 1), "sum": 0.0, "count": 0}
+                       for name, (_, b) in HISTOGRAMS.items()},
+                    **{name: 0.0 for name in SUMS},
+                }
+            for name, value in (
+                ("http_request_duration_seconds", duration),
+                ("http_request_db_queries", queries),
+                ("http_response_size_bytes", size),
+            ):
+                hist = series[name]
+                hist["buckets"][_bucket_index(HISTOGRAMS[name][1], value)] += 1
+                hist["sum"] += value
+                hist["count"] += 1
+            series["http_request_db_seconds_total"] += db_seconds
+            series["http_request_view_seconds_total"] += view_seconds
+            series["http_request_render_seconds_total"] += render_seconds
+
+    def snapshot(self):
+        with self._lock:
+            return [{"labels": list(k), "values": copy.deepcopy(v)} for k, v in self._series.items()]
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    # ---------- multi-process ----------
+    def maybe_flush(self, directory, interval):
+        now = time.monotonic()
+        if now - self._last_flush < interval:
+            return
+        self._last_flush = now
+        self.flush(directory)
+
+    def flush(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp, os.path.join(directory, f"worker-{os.getpid()}.json"))
+
+
+registry = Registry()
+
+
+def merge(snapshots):
+    merged = {}
+    for snapshot in snapshots:
+        for entry in snapshot:
+            key = tuple(entry["labels"])
+            values = entry["values"]
+            if key not in merged:
+                merged[key] = values
+                continue
+            target = merged[key]
+            for name in HISTOGRAMS:
+                target[name]["buckets"] = [a + b for a, b in zip(target[name]["buckets"], values[name]["buckets"])]
+                target[name]["sum"] += values[name]["sum"]
+                target[name]["count"] += values[name]["count"]
+            for name in SUMS:
+                target[name] += values[name]
+    return merged
+
+
+def collect():
+    """Series from this process, or from every worker when a multiprocess dir is configured."""
+    directory = options()["MULTIPROCESS_DIR"]
+    if not directory:
+        return merge([registry.snapshot()])
+    registry.flush(directory)
+    snapshots = []
+    for name in os.listdir(directory):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            continue  # a worker is mid-replace; it will be picked up next scrape
+    return merge(snapshots)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(key, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(LABELS, key)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}"
+
+
+def exposition(series):
+    lines = []
+    for name, (help_text, buckets) in HISTOGRAMS.items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        for key, values in sorted(series.items()):
+            hist = values[name]
+            cumulative = 0
+            for bound, count in zip((*buckets, "+Inf"), hist["buckets"]):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{name}_bucket{_labels(key, le)} {cumulative}")
+            lines.append(f"{name}_sum{_labels(key)} {hist['sum']}")
+            lines.append(f"{name}_count{_labels(key)} {hist['count']}")
+    for name, help_text in SUMS.items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        for key, values in sorted(series.items()):
+            lines.append(f"{name}{_labels(key)} {values[name]}")
+    return "\n".join(lines) + "\n"
+
+
+LOOPBACK = ("127.0.0.1", "::1")
+
+
+def metrics_view(request):
+    token = options()["TOKEN"]
+    if token:
+        allowed = request.headers.get("Authorization") == f"Bearer {token}"
+    else:
+        # REMOTE_ADDR, not X-Forwarded-For: a proxied request from outside must not pass
+        allowed = request.META.get("REMOTE_ADDR") in (*LOOPBACK, *settings.INTERNAL_IPS)
+    if not allowed:
+        return HttpResponseForbidden()
+    return HttpResponse(exposition(collect()), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+# ---------- middleware ----------
+
+def view_label(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"
+    cls = getattr(match.func, "cls", None) or getattr(match.func, "view_class", None)
+    if cls is None:
+        return match.view_name or match._func_path
+    actions = getattr(match.func, "actions", None)
+    action = actions.get(request.method.lower()) if actions else request.method.lower()
+    return f"{cls.__name__}.{action}"
+
+
+class _QueryTimer:
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.queries += 1
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        opts = options()
+        self.enabled = opts["ENABLED"]
+        self.directory = opts["MULTIPROCESS_DIR"]
+        self.flush_interval = opts["FLUSH_INTERVAL"]
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.enabled or request.path == "/metrics":
+            return self.get_response(request)
+        timer, start = self._start(request)
+        with dbhooks.hooked(timer):
+            response = self.get_response(request)
+        self._finish(request, response, timer, start)
+        return response
+
+    async def __acall__(self, request):
+        if not self.enabled or request.path == "/metrics":
+            return await self.get_response(request)
+        timer, start = self._start(request)
+        # the view's queries run on an executor thread; the hook follows the request context there
+        with dbhooks.hooked(timer):
+            response = await self.get_response(request)
+        self._finish(request, response, timer, start)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses render after the view returns; mark the split point
+        state = getattr(request, "_metrics", None)
+        if state is not None:
+            state["view_end"] = time.perf_counter()
+            state["view_db_seconds"] = state["timer"].seconds
+        return response
+
+    def _start(self, request):
+        timer = _QueryTimer()
+        request._metrics = {"timer": timer}
+        return timer, time.perf_counter()
+
+    def _finish(self, request, response, timer, start):
+        end = time.perf_counter()
+        state = request._metrics
+        view_end = state.get("view_end", end)
+        view_db = state.get("view_db_seconds", timer.seconds)
+        if response.streaming:
+            size = 0
+        else:
+            size = len(response.content)
+        registry.observe(
+            (view_label(request), request.method, str(response.status_code)),
+            duration=end - start,
+            queries=timer.queries,
+            db_seconds=timer.seconds,
+            view_seconds=max(view_end - start - view_db, 0.0),
+            render_seconds=end - view_end,
+            size=size,
+        )
+        if self.directory:
+            registry.maybe_flush(self.directory, self.flush_interval)
@@ -0,0 +1,115 @@
+"""
+OpenAPI schema, generated once and served as a precompressed static file.
+
+``manage.py build_openapi_schema`` writes ``openapi.json`` and
+``openapi.json.gz`` into ``API_DOCS["SCHEMA_DIR"]`` at build time. The
+schema view serves those files, picking the gzip variant when the client
+accepts it, with an ETag and a long ``Cache-Control``. If nothing was
+built it generates the schema on first request (when drf_yasg is
+available) and keeps it in memory for the life of the process. The
+Swagger/ReDoc pages load the schema from this view instead of
+regenerating it on every hit.
+"""
+import gzip
+import hashlib
+import os
+import threading
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.views.decorators.http import require_safe
+
+from .api_docs import docs_enabled
+
+SCHEMA_FILE = "openapi.json"
+
+INFO = {
+    "title": "Ecommerce Webapp API",
+    "default_version": "v1",
+    "description": "Ecommerce Webapp APi Testing with Swagger",
+}
+
+_lock = threading.Lock()
+_schema = None
+
+
+def generate():
+    """Introspect every endpoint and return the schema as JSON bytes."""
+    from drf_yasg import openapi
+    from drf_yasg.codecs import OpenAPICodecJson
+    from drf_yasg.generators import OpenAPISchemaGenerator
+
+    schema = OpenAPISchemaGenerator(openapi.Info(**INFO)).get_schema(request=None, public=True)
+    return OpenAPICodecJson(validators=[]).encode(schema)
+
+
+def compress(body):
+    # mtime=0 keeps the output, and so the ETag, stable across builds
+    return gzip.compress(body, compresslevel=9, mtime=0)
+
+
+def write(directory, body):
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for name, content in ((SCHEMA_FILE, body), (f"{SCHEMA_FILE}.gz", compress(body))):
+        path = os.path.join(directory, name)
+        with open(f"{path}.tmp", "wb") as f:
+            f.write(content)
+        os.replace(f"{path}.tmp", path)
+        paths.append(path)
+    return paths
+
+
+def _load():
+    path = os.path.join(settings.API_DOCS["SCHEMA_DIR"], SCHEMA_FILE)
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            body = f.read()
+        try:
+            with open(f"{path}.gz", "rb") as f:
+                compressed = f.read()
+        except FileNotFoundError:
+            compressed = compress(body)
+    elif docs_enabled():
+        body = generate()
+        compressed = compress(body)
+    else:
+        return None
+    return body, compressed, '"%s"' % hashlib.sha1(body).hexdigest()
+
+
+def get_schema():
+    global _schema
+    if _schema is None:
+        with _lock:
+            if _schema is None:
+                _schema = _load()
+    return _schema
+
+
+def reset():
+    global _schema
+    _schema = None
+
+
+@require_safe
+def schema_view(request):
+    schema = get_schema()
+    if schema is None:
+        raise Http404("API schema has not been built")
+    body, compressed, etag = schema
+
+    # each encoding is a different representation, so it gets its own strong ETag
+    gzipped = "gzip" in request.headers.get("Accept-Encoding", "")
+    if gzipped:
+        etag = f'{etag[:-1]}-gzip"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(compressed if gzipped else body, content_type="application/json")
+        if gzipped:
+            response["Content-Encoding"] = "gzip"
+    response["ETag"] = etag
+    response["Cache-Control"] = "public, max-age=3600"
+    patch_vary_headers(response, ["Accept-Encoding"])
+    return response
@@ -0,0 +1,13 @@
+"""
+Settings dicts overlaid on module defaults.
+
+Modules with tunables keep them in a ``DEFAULTS`` dict and expose
+``options()``, built on ``merged``; ``settings.py`` only lists the keys
+it overrides, so every default is defined once, next to the code using it.
+"""
+from django.conf import settings
+
+
+def merged(setting, defaults):
+    """``defaults`` updated with the ``settings.<setting>`` dict, read at call time."""
+    return {**defaults, **getattr(settings, setting, {})}
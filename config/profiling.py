@@ -0,0 +1,230 @@
+"""
+On-demand request profiling.
+
+``ProfilingMiddleware`` profiles a request when either
+
+* it carries the ``X-Profile`` header and comes from a staff user (Django
+  session or a staff JWT), or
+* it is picked by 1-in-``SAMPLE_RATE`` random sampling.
+
+Under WSGI (and for sync views) the request is profiled with cProfile and
+written as a ``.prof`` pstats file. Under ASGI the request hops between the
+event loop and executor threads, which cProfile can't follow, so a
+statistical stack sampler records ``.folded`` collapsed stacks (flamegraph
+input) instead; it samples every thread, so concurrent requests show up
+too. Either way the SQL the request executed is written next to it as
+``.sql.txt``, the newest ``KEEP`` profiles are kept in ``DIR`` and the
+profile name is returned in the ``X-Profile-Id`` response header.
+"""
+import cProfile
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.utils import timezone
+from django.utils.text import slugify
+from rest_framework_simplejwt.exceptions import InvalidToken, AuthenticationFailed
+
+from config import dbhooks
+from config.options import merged
+from core.authentication import CachedJWTAuthentication
+
+DEFAULTS = {
+    "ENABLED": True,
+    "HEADER": "X-Profile",
+    # profile 1 in N requests; 0 disables sampling
+    "SAMPLE_RATE": 0,
+    "DIR": None,
+    "KEEP": 50,
+    # "cprofile" or "sampler" for sync requests; async requests always use the sampler
+    "MODE": "cprofile",
+    "SAMPLER_INTERVAL": 0.001,
+}
+
+EXTENSIONS = (".prof", ".folded", ".sql.txt")
+
+
+def options():
+    opts = merged("PROFILING", DEFAULTS)
+    if opts["DIR"] is None:
+        opts["DIR"] = os.path.join(settings.BASE_DIR, "profiles")
+    return opts
+
+
+class StackSampler(threading.Thread):
+    """Collect collapsed stacks of the given threads (or all threads) every ``interval`` seconds."""
+
+    def __init__(self, interval, thread_ids=None):
+        super().__init__(name="request-stack-sampler", daemon=True)
+        self.interval = interval
+        self.thread_ids = thread_ids
+        self.counts = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        me = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == me or (self.thread_ids and thread_id not in self.thread_ids):
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.counts[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def folded(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.counts.most_common())
+
+
+class _SQLRecorder:
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.statements.append((time.perf_counter() - start, sql, params))
+
+    def dump(self):
+        total = sum(d for d, _, _ in self.statements)
+        lines = [f"-- {len(self.statements)} statements, {total * 1000:.2f} ms"]
+        for duration, sql, params in self.statements:
+            lines.append(f"-- {duration * 1000:.2f} ms params={params!r}\n{sql};")
+        return "\n".join(lines) + "\n"
+
+
+def _is_staff_request(request):
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return user.is_staff
+    if not request.headers.get("Authorization"):
+        return False
+    try:
+        result = CachedJWTAuthentication().authenticate(request)
+    except (InvalidToken, AuthenticationFailed):
+        return False
+    return bool(result and result[0].is_staff)
+
+
+class ProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.options = options()
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def sampled(self):
+        rate = self.options["SAMPLE_RATE"]
+        return bool(rate) and random.random() * rate < 1
+
+    def requested(self, request):
+        return self.options["HEADER"] in request.headers
+
+    def should_profile(self, request):
+        if not self.options["ENABLED"]:
+            return False
+        return self.sampled() or (self.requested(request) and _is_staff_request(request))
+
+    async def ashould_profile(self, request):
+        # only the staff check can hit the database, so only it leaves the event loop
+        if not self.options["ENABLED"]:
+            return False
+        if self.sampled():
+            return True
+        return self.requested(request) and await sync_to_async(_is_staff_request)(request)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.should_profile(request):
+            return self.get_response(request)
+
+        recorder = _SQLRecorder()
+        with dbhooks.hooked(recorder):
+            if self.options["MODE"] == "sampler":
+                sampler = StackSampler(self.options["SAMPLER_INTERVAL"], {threading.get_ident()})
+                sampler.start()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    sampler.stop()
+                artifacts = {".folded": sampler.folded()}
+            else:
+                profiler = cProfile.Profile()
+                profiler.enable()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    profiler.disable()
+                artifacts = {".prof": profiler}
+        response["X-Profile-Id"] = self.save(request, artifacts, recorder)
+        return response
+
+    async def __acall__(self, request):
+        if not await self.ashould_profile(request):
+            return await self.get_response(request)
+
+        recorder = _SQLRecorder()
+        sampler = StackSampler(self.options["SAMPLER_INTERVAL"])
+        # SQL is captured on whichever thread runs the view (see config.dbhooks)
+        with dbhooks.hooked(recorder):
+            sampler.start()
+            try:
+                response = await self.get_response(request)
+            finally:
+                sampler.stop()
+        response["X-Profile-Id"] = await sync_to_async(self.save)(
+            request, {".folded": sampler.folded()}, recorder
+        )
+        return response
+
+    def save(self, request, artifacts, recorder):
+        directory = self.options["DIR"]
+        os.makedirs(directory, exist_ok=True)
+        stamp = timezone.now().strftime("%Y%m%dT%H%M%S.%f")
+        name = f"{stamp}-{os.getpid()}-{request.method}-{slugify(request.path)[:80] or 'root'}"
+        base = os.path.join(directory, name)
+        for extension, artifact in artifacts.items():
+            if extension == ".prof":
+                artifact.dump_stats(base + extension)
+            else:
+                with open(base + extension, "w") as f:
+                    f.write(artifact)
+        with open(base + ".sql.txt", "w") as f:
+            f.write(recorder.dump())
+        self.rotate(directory)
+        return name
+
+    def rotate(self, directory):
+        profiles = {}
+        for filename in os.listdir(directory):
+            for extension in EXTENSIONS:
+                if filename.endswith(extension):
+                    profiles.setdefault(filename[: -len(extension)], []).append(filename)
+                    break
+        keep = self.options["KEEP"]
+        if keep <= 0:
+            return
+        # names start with a UTC timestamp, so they sort chronologically
+        for name in sorted(profiles)[:-keep]:
+            for filename in profiles[name]:
+                try:
+                    os.remove(os.path.join(directory, filename))
+                except FileNotFoundError:
+                    pass
@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+from importlib.util import find_spec
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -39,17 +41,18 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
         "rest_framework",
     "rest_framework_simplejwt",
-    "drf_yasg",
     "core",
     "store",
 ]
 
 MIDDLEWARE = [
+    'config.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'config.profiling.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -76,6 +79,20 @@ TEMPLATES = [
 WSGI_APPLICATION = 'config.wsgi.application'
 
 
+# API docs (config.api_docs, config.openapi): drf_yasg and the Swagger/ReDoc
+# pages are loaded only when ENABLED; /openapi.json serves the schema built
+# by `manage.py build_openapi_schema` into SCHEMA_DIR either way
+API_DOCS = {
+    "ENABLED": os.environ.get("API_DOCS_ENABLED", "1" if DEBUG else "0") == "1",
+    "SCHEMA_DIR": BASE_DIR / "openapi",
+}
+if API_DOCS["ENABLED"] and find_spec("drf_yasg") is not None:
+    INSTALLED_APPS.append("drf_yasg")
+
+# the UIs fetch the cached schema instead of having drf_yasg regenerate it
+SWAGGER_SETTINGS = {"SPEC_URL": "openapi-schema"}
+REDOC_SETTINGS = {"SPEC_URL": "openapi-schema"}
+
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
@@ -85,19 +102,97 @@ DATABASES = {
         'NAME': BASE_DIR / 'db.sqlite3',
     }
 }
+
+# a shared cache (throttle buckets, cart ids, auth users) when REDIS_URL is set;
+# otherwise per-process memory, which is only right for a single worker
+CACHES = {
+    "default": (
+        {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": os.environ["REDIS_URL"]}
+        if os.environ.get("REDIS_URL")
+        else {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    ),
+}
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'   # if BASE_DIR is a Path
 
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        # JWTAuthentication with the user cached between requests
+        "core.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
     ),
+    # orjson-backed when installed, otherwise identical to DRF's stdlib JSON classes
+    "DEFAULT_RENDERER_CLASSES": [
+        "config.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "config.renderers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
+    # token buckets for the auth routes (core.throttling)
+    "DEFAULT_THROTTLE_RATES": {
+        "auth_ip": "30/min",
+        "auth_username": "10/min",
+    },
+    # auth_ip keys on REMOTE_ADDR; behind N reverse proxies set NUM_PROXIES = N
+    # so the client address they forward is used (X-Forwarded-For is never trusted otherwise)
 }
 
+# application/msgpack for mobile clients, when msgpack is installed
+if find_spec("msgpack") is not None:
+    REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"].append("config.renderers.MessagePackRenderer")
+    REST_FRAMEWORK["DEFAULT_PARSER_CLASSES"].append("config.renderers.MessagePackParser")
+
+# Module tunables below are dicts overlaid on the module's DEFAULTS
+# (config.options); list only the keys that differ here.
+
+# catalog response cache (store.cache): in-process LRU plus an optional shared
+# tier in the named CACHES alias, used whenever "default" is Redis; without it
+# each worker only sees another's catalog writes once its entries expire
+STORE_CATALOG_CACHE = {
+    "SHARED_ALIAS": "default" if os.environ.get("REDIS_URL") else None,
+}
+
+# stock reservations taken at add-to-cart (store.reservations): a hold lasts TTL
+# seconds from the cart's last change; run `manage.py sweep_reservations
+# --interval 60` to release expired holds
+STORE_RESERVATIONS = {}
+
+# admin order change feed (store.changes): rows younger than SETTLE_SECONDS are
+# held back so transactions that commit out of order aren't skipped by pollers
+STORE_CHANGE_FEED = {}
+
+# background jobs (core.jobs), run by `manage.py run_workers`; a claimed job not
+# finished within VISIBILITY_TIMEOUT seconds is retried, failures back off from
+# BACKOFF seconds doubling up to MAX_BACKOFF
+JOBS = {}
+
+EMAIL_BACKEND = os.environ.get("EMAIL_BACKEND", "django.core.mail.backends.console.EmailBackend")
+DEFAULT_FROM_EMAIL = os.environ.get("DEFAULT_FROM_EMAIL", "shop@localhost")
+
+# per-endpoint metrics exposed at /metrics (config.metrics); with several
+# worker processes point MULTIPROCESS_DIR at a directory shared by them.
+# Without METRICS_TOKEN only loopback and INTERNAL_IPS clients may scrape it
+METRICS = {
+    "MULTIPROCESS_DIR": os.environ.get("METRICS_MULTIPROCESS_DIR"),
+    "TOKEN": os.environ.get("METRICS_TOKEN"),
+}
+
+# on-demand profiling (config.profiling): staff requests sending X-Profile, or
+# 1 in SAMPLE_RATE requests, are profiled into DIR (default BASE_DIR / "profiles")
+PROFILING = {
+    "SAMPLE_RATE": int(os.environ.get("PROFILING_SAMPLE_RATE", 0)),
+    "DIR": os.environ.get("PROFILING_DIR"),
+}
+
+# page size for store.pagination.KeysetPagination (?page_size= overrides, capped at 100)
+STORE_PAGE_SIZE = 20
+
 
 from datetime import timedelta
 
@@ -106,6 +201,16 @@ SIMPLE_JWT = {
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
 }
 
+# password hashing for login/registration runs on a bounded pool
+# (core.hashing); requests beyond WORKERS + MAX_QUEUE get a 429
+PASSWORD_HASHING = {}
+
+AUTHENTICATION_BACKENDS = ["core.backends.PooledModelBackend"]
+
+# seconds a JWT-authenticated user stays cached (core.authentication); saves
+# and deletes of the user drop the entry immediately
+AUTH_USER_CACHE_TIMEOUT = 300
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -0,0 +1,72 @@
+"""
+JWT authentication without a user query per request.
+
+``JWTAuthentication`` loads the user on every authenticated request. Here the
+loaded user is kept in the Django cache under its id for
+``AUTH_USER_CACHE_TIMEOUT`` seconds, and every save or delete of the user
+drops the entry (see ``core.signals``), so profile updates and deactivations
+apply on the next request. Updates that bypass ``save()`` (e.g.
+``QuerySet.update``) are picked up when the entry expires.
+
+The token's version is still checked on every hit: with
+``SIMPLE_JWT["CHECK_REVOKE_TOKEN"]`` enabled, a password change invalidates
+outstanding tokens even while the user is cached.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+USER_KEY = "core:auth-user:{}"
+
+
+def user_cache_key(user_id):
+    return USER_KEY.format(user_id)
+
+
+def forget_user(user_id):
+    cache.delete(user_cache_key(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+
+    def get_user(self, validated_token):
+        key = user_cache_key(self._user_id(validated_token))
+        user = cache.get(key)
+        if user is None:
+            # full checks (exists, active, token version) on the way into the cache
+            user = super().get_user(validated_token)
+            cache.set(key, user, self.timeout)
+            return user
+        self._check_version(validated_token, user)
+        return user
+
+    async def aget_user(self, validated_token):
+        """``get_user`` for async views: a cache hit never leaves the event loop."""
+        user = await cache.aget(user_cache_key(self._user_id(validated_token)))
+        if user is None:
+            return await sync_to_async(self.get_user)(validated_token)
+        self._check_version(validated_token, user)
+        return user
+
+    @property
+    def timeout(self):
+        return getattr(settings, "AUTH_USER_CACHE_TIMEOUT", 300)
+
+    @staticmethod
+    def _user_id(validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+    @staticmethod
+    def _check_version(validated_token, user):
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
@@ -0,0 +1,85 @@
+"""
+Password hashing off the request thread, with admission control.
+
+PBKDF2 costs tens of milliseconds of CPU per call, so an unbounded login
+burst competes with every other request on the worker. Hashes are computed
+on a small thread pool instead (``hashlib.pbkdf2_hmac`` releases the GIL,
+so the pool runs in parallel with request threads); at most ``WORKERS``
+run at once and at most ``MAX_QUEUE`` more wait. Past that, callers get an
+immediate 429 rather than queueing behind the burst.
+
+Only pure functions run on the pool (``make_password``,
+``verify_password``); database access stays on the request thread.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from django.contrib.auth.hashers import make_password, verify_password
+from rest_framework.exceptions import Throttled
+
+from config.options import merged
+
+DEFAULTS = {
+    "WORKERS": min(4, os.cpu_count() or 1),
+    "MAX_QUEUE": 16,
+    # seconds to wait for an admitted hash before giving up
+    "TIMEOUT": 10,
+}
+
+
+class PoolSaturated(Throttled):
+    default_detail = "Too many sign-in requests in progress, please retry shortly."
+
+
+class HashingPool:
+    def __init__(self, workers, max_queue, timeout):
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+
+    def run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise PoolSaturated(wait=1)
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(self.timeout)
+        except FutureTimeout:
+            # admitted but stuck behind the queue; drop it if it hasn't started
+            future.cancel()
+            raise PoolSaturated(wait=1)
+
+
+def options():
+    return merged("PASSWORD_HASHING", DEFAULTS)
+
+
+def _build_pool():
+    opts = options()
+    return HashingPool(opts["WORKERS"], opts["MAX_QUEUE"], opts["TIMEOUT"])
+
+
+pool = _build_pool()
+
+
+def hash_password(password):
+    return pool.run(make_password, password)
+
+
+def check_password(user, password):
+    """
+    ``user.check_password`` with the hash computed on the pool. Hashes made
+    with an outdated hasher or iteration count are upgraded in place, as
+    Django does.
+    """
+    is_correct, must_update = pool.run(verify_password, password, user.password)
+    if is_correct and must_update:
+        user.password = hash_password(password)
+        user.save(update_fields=["password"])
+    return is_correct
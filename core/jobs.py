@@ -0,0 +1,187 @@
+"""
+Database-backed background job queue (a transactional outbox).
+
+``enqueue`` inserts a ``Job`` row through the caller's connection, so a job
+queued inside a request's ``transaction.atomic`` commits or rolls back with
+the rest of the request: workers can never see a job for an order that
+doesn't exist, and a committed order never loses its follow-ups.
+
+Workers (``manage.py run_workers``) claim due jobs with one conditional
+UPDATE per batch:
+
+    UPDATE job SET status = running, run_after = now + visibility,
+                   attempts = attempts + 1, claimed_by = :token
+    WHERE id IN (..) AND status IN (queued, running) AND run_after <= now
+
+Two workers racing for the same rows can't both win, which works the same
+on SQLite and PostgreSQL. A claimed job that isn't acknowledged before its
+visibility timeout (the worker died or hung) becomes due again, so delivery
+is at-least-once and handlers should be idempotent. Successful jobs are
+deleted; a failing job is retried with exponential backoff until
+``max_attempts``, then left ``failed`` for inspection.
+
+Handlers are registered by name with ``@task("...")``; apps define theirs
+in a ``tasks`` module imported from ``AppConfig.ready()``.
+"""
+import datetime
+import logging
+import random
+import socket
+import threading
+import time
+import traceback
+import uuid
+
+from django.db import OperationalError, close_old_connections, connection
+from django.db.models import F
+from django.utils import timezone
+
+from config.options import merged
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "WORKERS": 4,
+    "BATCH_SIZE": 10,
+    "POLL_INTERVAL": 1.0,
+    "VISIBILITY_TIMEOUT": 300,
+    "MAX_ATTEMPTS": 5,
+    "BACKOFF": 10,
+    "MAX_BACKOFF": 3600,
+}
+
+_handlers = {}
+
+
+def options():
+    return merged("JOBS", DEFAULTS)
+
+
+def task(name):
+    """Register the decorated function as the handler for jobs called ``name``."""
+    def register(func):
+        _handlers[name] = func
+        return func
+    return register
+
+
+def enqueue(name, payload=None, delay=0, max_attempts=None):
+    """Queue a job in the current transaction; it becomes visible to workers on commit."""
+    if name not in _handlers:
+        raise KeyError(f"No job handler registered for {name!r}")
+    return Job.objects.create(
+        name=name,
+        payload=payload or {},
+        max_attempts=max_attempts or options()["MAX_ATTEMPTS"],
+        run_after=timezone.now() + datetime.timedelta(seconds=delay),
+    )
+
+
+def backoff(attempts):
+    """Seconds before retry ``attempts + 1``: exponential, capped, with jitter."""
+    opts = options()
+    delay = min(opts["BACKOFF"] * 2 ** (attempts - 1), opts["MAX_BACKOFF"])
+    return delay * random.uniform(0.5, 1.0)
+
+
+def _retry_locked(func, attempts=5):
+    """Run a short write, retrying while SQLite reports the database locked."""
+    for attempt in range(attempts):
+        try:
+            return func()
+        except OperationalError:
+            if attempt == attempts - 1:
+                raise
+            time.sleep(0.05 * 2 ** attempt)
+
+
+def claim(limit, now=None):
+    """Claim up to ``limit`` due jobs for this worker and return them."""
+    now = now or timezone.now()
+    due = Job.objects.filter(status__in=[Job.QUEUED, Job.RUNNING], run_after__lte=now)
+    ids = list(due.order_by("run_after").values_list("pk", flat=True)[:limit])
+    if not ids:
+        return []
+    token = f"{socket.gethostname()}:{threading.get_ident()}:{uuid.uuid4().hex[:12]}"[-64:]
+    _retry_locked(lambda: due.filter(pk__in=ids).update(
+        status=Job.RUNNING,
+        run_after=now + datetime.timedelta(seconds=options()["VISIBILITY_TIMEOUT"]),
+        attempts=F("attempts") + 1,
+        claimed_by=token,
+    ))
+    return list(Job.objects.filter(pk__in=ids, claimed_by=token))
+
+
+def run(job):
+    """Run a claimed job and record the outcome. Returns True on success."""
+    handler = _handlers.get(job.name)
+    ours = Job.objects.filter(pk=job.pk, claimed_by=job.claimed_by)
+    try:
+        if handler is None:
+            raise LookupError(f"No job handler registered for {job.name!r}")
+        handler(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning("job %s #%s failed (attempt %s/%s)", job.name, job.pk, job.attempts, job.max_attempts)
+        if handler is not None and job.attempts < job.max_attempts:
+            retry_at = timezone.now() + datetime.timedelta(seconds=backoff(job.attempts))
+            _retry_locked(lambda: ours.update(status=Job.QUEUED, run_after=retry_at, claimed_by="", last_error=error))
+        else:
+            _retry_locked(lambda: ours.update(status=Job.FAILED, claimed_by="", last_error=error))
+        return False
+    # a job whose claim expired and was taken over is left to the new owner
+    _retry_locked(ours.delete)
+    return True
+
+
+def work(batch_size=None, stop=None, once=False, poll_interval=None):
+    """
+    Claim and run jobs until ``stop`` is set. With ``once`` return as soon
+    as no job is due instead of polling. Returns the number of jobs run.
+    """
+    opts = options()
+    batch_size = batch_size or opts["BATCH_SIZE"]
+    poll_interval = opts["POLL_INTERVAL"] if poll_interval is None else poll_interval
+    stop = stop or threading.Event()
+    done = 0
+    while not stop.is_set():
+        close_old_connections()
+        try:
+            jobs = claim(batch_size)
+            for job in jobs:
+                run(job)
+                done += 1
+        except OperationalError:
+            # the database is briefly unavailable; unacknowledged claims expire and are retried
+            logger.exception("job worker database error")
+            stop.wait(poll_interval)
+            continue
+        if not jobs:
+            if once:
+                break
+            stop.wait(poll_interval)
+    return done
+
+
+def run_workers(workers=None, stop=None, **kwargs):
+    """Run ``work`` on ``workers`` threads, each with its own connection, until they return."""
+    stop = stop or threading.Event()
+    counts = []
+
+    def target():
+        try:
+            counts.append(work(stop=stop, **kwargs))
+        finally:
+            connection.close()
+
+    threads = [
+        threading.Thread(target=target, name=f"job-worker-{n}", daemon=True)
+        for n in range(workers or options()["WORKERS"])
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        while thread.is_alive():
+            thread.join(0.5)  # wake up for KeyboardInterrupt
+    return sum(counts)
@@ -0,0 +1,31 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from core import jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Run background job workers (core.jobs) on a pool of threads. Stops on "
+        "SIGINT/SIGTERM after the jobs in hand finish; --once drains due jobs and exits."
+    )
+
+    def add_arguments(self, parser):
+        opts = jobs.options()
+        parser.add_argument("--workers", type=int, default=opts["WORKERS"])
+        parser.add_argument("--batch-size", type=int, default=opts["BATCH_SIZE"])
+        parser.add_argument("--poll-interval", type=float, default=opts["POLL_INTERVAL"])
+        parser.add_argument("--once", action="store_true", help="exit when no job is due")
+
+    def handle(self, *args, workers, batch_size, poll_interval, once, **options):
+        stop = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: stop.set())
+
+        self.stderr.write(f"{workers} workers polling every {poll_interval}s")
+        done = jobs.run_workers(
+            workers, stop=stop, batch_size=batch_size, once=once, poll_interval=poll_interval
+        )
+        self.stdout.write(f"{done} jobs run")
@@ -7,3 +7,32 @@ class User(AbstractUser):
 
     def __str__(self):
         return self.username
+
+
+class Job(models.Model):
+    """A unit of background work in the database-backed queue (core.jobs)."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    FAILED = "failed"
+    STATUS_CHOICES = [(QUEUED, "Queued"), (RUNNING, "Running"), (FAILED, "Failed")]
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    # queued: not before this; running: the claim expires (and the job is retried) at this
+    run_after = models.DateTimeField()
+    claimed_by = models.CharField(max_length=64, blank=True, default="")
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # workers poll WHERE status IN (queued, running) AND run_after <= now ORDER BY run_after
+            models.Index(fields=["status", "run_after"], name="job_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
@@ -2,6 +2,7 @@ from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from .hashing import hash_password
 
 User = get_user_model()
 
@@ -22,10 +23,18 @@ class RegisterSerializer(serializers.ModelSerializer):
         validated_data.pop("password2")
         password = validated_data.pop("password")
         user = User(**validated_data)
-        user.set_password(password)
+        user.password = hash_password(password)  # hashed on core.hashing.pool
         user.save()
         return user
 
+    def update(self, instance, validated_data):
+        # ProfileView shares this serializer; never store the raw password
+        validated_data.pop("password2", None)
+        password = validated_data.pop("password", None)
+        if password is not None:
+            instance.password = hash_password(password)
+        return super().update(instance, validated_data)
+
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     def validate(self, attrs):
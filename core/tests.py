@@ -1,3 +1,182 @@
-from django.test import TestCase
+import datetime
+import threading
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import hashing, jobs
+from .models import Job
+
+User = get_user_model()
+
+
+class CachedJWTAuthenticationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="buyer", password="pass12345", name="Old")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+
+    def user_queries(self, path):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(path)
+        return response, [q["sql"] for q in ctx.captured_queries if '"core_user"' in q["sql"]]
+
+    def test_user_is_loaded_once(self):
+        _, first = self.user_queries("/api/auth/profile/")
+        response, second = self.user_queries("/api/auth/profile/")
+        self.assertEqual(len(first), 1)
+        self.assertEqual(second, [])
+        self.assertEqual(response.data["username"], "buyer")
+
+    def test_profile_update_and_deactivation_invalidate(self):
+        self.client.get("/api/auth/profile/")
+        response = self.client.put("/api/auth/profile/", {
+            "username": "buyer", "email": "b@example.com", "name": "New",
+            "password": "Xk29!pq7Lm", "password2": "Xk29!pq7Lm",
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get("/api/auth/profile/").data["name"], "New")
+
+        self.user.refresh_from_db()
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get("/api/auth/profile/").status_code, 401)
+
+
+class PasswordHashingTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        User.objects.create_user(username="buyer", password="pass12345")
+
+    def login(self, password="pass12345", username="buyer", **extra):
+        return self.client.post("/api/auth/login/", {"username": username, "password": password}, **extra)
+
+    def test_login_and_register_hash_on_the_pool(self):
+        self.assertEqual(self.login().status_code, 200)
+        self.assertEqual(self.login("wrong").status_code, 401)
+
+        response = self.client.post("/api/auth/register/", {
+            "username": "new", "email": "n@example.com", "password": "Xk29!pq7Lm", "password2": "Xk29!pq7Lm",
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(User.objects.get(username="new").check_password("Xk29!pq7Lm"))
+
+    def test_saturated_pool_rejects_with_429(self):
+        saturated = hashing.HashingPool(workers=1, max_queue=0, timeout=1)
+        saturated._slots.acquire()
+        with mock.patch.object(hashing, "pool", saturated):
+            response = self.login()
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+
+    def test_hash_timeout_rejects_with_429(self):
+        slow = hashing.HashingPool(workers=1, max_queue=1, timeout=0.01)
+        release = threading.Event()
+        slow._executor.submit(release.wait)
+        try:
+            with mock.patch.object(hashing, "pool", slow):
+                response = self.login()
+        finally:
+            release.set()
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+
+    def test_ip_bucket_ignores_forwarded_for(self):
+        rates = {"auth_ip": "3/min", "auth_username": "100/min"}
+        with self.settings(REST_FRAMEWORK={"DEFAULT_THROTTLE_RATES": rates}):
+            statuses = [
+                self.login("wrong", username=f"user{n}", HTTP_X_FORWARDED_FOR=f"10.0.0.{n}").status_code
+                for n in range(4)
+            ]
+        self.assertEqual(statuses, [401, 401, 401, 429])
+
+    def test_username_bucket_limits_bursts(self):
+        rates = {"auth_ip": "100/min", "auth_username": "3/min"}
+        with self.settings(REST_FRAMEWORK={"DEFAULT_THROTTLE_RATES": rates}):
+            statuses = [self.login("wrong").status_code for _ in range(4)]
+            other = self.login("wrong", username="someone-else").status_code
+        self.assertEqual(statuses, [401, 401, 401, 429])
+        self.assertEqual(other, 401)
+
+
+class JobQueueTests(TestCase):
+
+    def setUp(self):
+        self.calls = []
+        self.failures = 0
+        self.register("test.record", lambda value: self.calls.append(value))
+        self.register("test.flaky", self.flaky)
+
+    def register(self, name, handler):
+        jobs.task(name)(handler)
+        self.addCleanup(jobs._handlers.pop, name)
+
+    def flaky(self):
+        self.failures += 1
+        raise RuntimeError("boom")
+
+    def test_jobs_run_and_are_removed(self):
+        jobs.enqueue("test.record", {"value": 1})
+        jobs.enqueue("test.record", {"value": 2}, delay=60)
+        self.assertEqual(jobs.work(once=True), 1)
+        self.assertEqual(self.calls, [1])
+        self.assertEqual(list(Job.objects.values_list("payload", flat=True)), [{"value": 2}])
+
+    def test_failures_back_off_then_fail(self):
+        job = jobs.enqueue("test.flaky", max_attempts=2)
+        with self.assertLogs("core.jobs", "WARNING") as logs:
+            jobs.work(once=True)
+        self.assertEqual(logs.output, [f"WARNING:core.jobs:job test.flaky #{job.pk} failed (attempt 1/2)"])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertGreater(job.run_after, timezone.now() + datetime.timedelta(seconds=4))
+        self.assertIn("RuntimeError: boom", job.last_error)
+
+        Job.objects.update(run_after=timezone.now())
+        with self.assertLogs("core.jobs", "WARNING") as logs:
+            jobs.work(once=True)
+        self.assertEqual(logs.output, [f"WARNING:core.jobs:job test.flaky #{job.pk} failed (attempt 2/2)"])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, self.failures), (Job.FAILED, 2, 2))
+        self.assertEqual(jobs.work(once=True), 0)
+
+    def test_expired_claim_is_retried_and_stale_ack_ignored(self):
+        jobs.enqueue("test.record", {"value": 1})
+        (stale,) = jobs.claim(10)
+        self.assertEqual(jobs.claim(10), [])  # invisible while claimed
+
+        later = timezone.now() + datetime.timedelta(seconds=jobs.options()["VISIBILITY_TIMEOUT"] + 1)
+        (fresh,) = jobs.claim(10, now=later)
+        self.assertEqual(fresh.attempts, 2)
+        self.assertTrue(jobs.run(stale))
+        self.assertTrue(Job.objects.filter(pk=fresh.pk).exists())  # not the stale worker's to delete
+        self.assertTrue(jobs.run(fresh))
+        self.assertFalse(Job.objects.exists())
+
+
+class JobWorkerPoolTests(TransactionTestCase):
+
+    def test_each_job_runs_once_across_threads(self):
+        seen, lock = [], threading.Lock()
+
+        def record(value):
+            with lock:
+                seen.append(value)
+
+        jobs.task("test.pool")(record)
+        self.addCleanup(jobs._handlers.pop, "test.pool")
+        for n in range(40):
+            jobs.enqueue("test.pool", {"value": n})
+        self.assertEqual(jobs.run_workers(4, batch_size=3, once=True), 40)
+        self.assertEqual(sorted(seen), list(range(40)))
@@ -0,0 +1,90 @@
+"""
+Token-bucket throttles for the auth routes.
+
+Each client gets a bucket of ``N`` tokens for a rate of ``"N/period"``,
+refilled continuously at ``N / period`` tokens per second; a request spends
+one token. Unlike DRF's sliding-window throttles, a client that has been
+quiet can burst up to ``N`` requests, while sustained traffic is held to
+the rate. Buckets live in the Django cache, so every worker shares them
+when ``default`` points at Redis or Memcached. Read-modify-write is not
+atomic across processes; concurrent requests can occasionally both spend
+the last token, which is acceptable for abuse throttling.
+"""
+import hashlib
+import time
+
+from django.core.cache import cache as default_cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate):
+    """``"10/min"`` -> ``(10, 60)``."""
+    count, period = rate.split("/")
+    return int(count), PERIODS[period[0]]
+
+
+class TokenBucketThrottle(BaseThrottle):
+    scope = None
+    cache = default_cache
+    timer = time.time
+
+    def get_ident_key(self, request, view):
+        """Return the bucket's identity, or ``None`` to not throttle the request."""
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+        ident = self.get_ident_key(request, view)
+        if rate is None or ident is None:
+            return True
+        capacity, period = parse_rate(rate)
+        self.refill_rate = capacity / period
+
+        key = f"throttle:{self.scope}:{ident}"
+        now = self.timer()
+        tokens, updated = self.cache.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * self.refill_rate)
+        self.tokens = tokens
+        if tokens < 1:
+            return False
+        # an idle bucket refills completely within one period, so it can expire then
+        self.cache.set(key, (tokens - 1, now), period)
+        return True
+
+    def wait(self):
+        return (1 - self.tokens) / self.refill_rate
+
+
+class AuthIPThrottle(TokenBucketThrottle):
+    """
+    Per-client-address limit. The address is ``REMOTE_ADDR``: DRF's
+    ``get_ident`` trusts X-Forwarded-For unless ``NUM_PROXIES`` is set, which
+    would let a client pick a fresh bucket per request. Behind proxies, set
+    ``NUM_PROXIES`` and the forwarded address they append is used instead.
+    """
+    scope = "auth_ip"
+
+    def get_ident_key(self, request, view):
+        if api_settings.NUM_PROXIES is not None:
+            return self.get_ident(request)
+        return request.META.get("REMOTE_ADDR")
+
+
+class AuthUsernameThrottle(TokenBucketThrottle):
+    """Per-account limit, so one username can't be hammered from many IPs."""
+    scope = "auth_username"
+
+    def get_ident_key(self, request, view):
+        if request.method != "POST":
+            return None
+        username = request.data.get("username")
+        if not isinstance(username, str) or not username:
+            return None
+        # hashed: usernames are unvalidated input here and end up in a cache key
+        return hashlib.sha1(username.strip().lower().encode()).hexdigest()
+
+
+AUTH_THROTTLES = [AuthIPThrottle, AuthUsernameThrottle]
@@ -1,10 +1,11 @@
 from django.urls import path
 from .views import RegisterView, LoginView, ProfileView
 from rest_framework_simplejwt.views import TokenRefreshView
+from .throttling import AuthIPThrottle
 
 urlpatterns = [
     path("register/", RegisterView.as_view(), name="register"),
     path("login/", LoginView.as_view(), name="login"),
-    path("token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
+    path("token/refresh/", TokenRefreshView.as_view(throttle_classes=[AuthIPThrottle]), name="token_refresh"),
     path("profile/", ProfileView.as_view(), name="profile"),
 ]
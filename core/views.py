@@ -1,11 +1,11 @@
-from drf_yasg.utils import swagger_auto_schema
-from drf_yasg import openapi
+from config.api_docs import openapi, swagger_auto_schema
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework import generics
 from django.contrib.auth import get_user_model
 from .serializers import RegisterSerializer, CustomTokenObtainPairSerializer
+from .throttling import AUTH_THROTTLES
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework.generics import RetrieveUpdateAPIView
 
@@ -16,10 +16,11 @@ class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = RegisterSerializer
     permission_classes = [AllowAny]
+    throttle_classes = AUTH_THROTTLES
 
     @swagger_auto_schema(
         operation_description="Register new user",
-        responses={201: RegisterSerializer()}
+        responses={201: RegisterSerializer(), 429: "Rate limited or server busy"}
     )
     def post(self, request, *args, **kwargs):
         return super().post(request, *args, **kwargs)
@@ -28,10 +29,11 @@ class RegisterView(generics.CreateAPIView):
 class LoginView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
     permission_classes = [AllowAny]
+    throttle_classes = AUTH_THROTTLES
 
     @swagger_auto_schema(
         operation_description="Login with username/email and password",
-        responses={200: "Access & Refresh tokens"}
+        responses={200: "Access & Refresh tokens", 429: "Rate limited or server busy"}
     )
     def post(self, request, *args, **kwargs):
         return super().post(request, *args, **kwargs)
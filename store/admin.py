@@ -1,5 +1,9 @@
 from django.contrib import admin
-from .models import Category, Product, Cart, CartItem, Order, OrderItem
+from django.core.exceptions import ValidationError
+from django.db.models import F
+from django.forms.models import BaseInlineFormSet
+from .models import Category, Product, Cart, CartItem, Order, OrderItem, OrderEvent, StockReservation
+from . import search, changes, reservations
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -9,23 +13,61 @@ class CategoryAdmin(admin.ModelAdmin):
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
-    list_display = ('id', 'name', 'category', 'price', 'stock', 'is_active', 'created_at')
+    list_display = ('id', 'name', 'category', 'price', 'stock', 'reserved', 'is_active', 'created_at')
     list_filter = ('category', 'is_active')
     search_fields = ('name', 'description')
+    readonly_fields = ('reserved',)  # maintained by store.reservations
     prepopulated_fields = {"slug": ("name",)}
 
+    def get_search_results(self, request, queryset, search_term):
+        # use the full-text index instead of LIKE '%term%' scans over description
+        if not search_term:
+            return queryset, False
+        return search.filter_queryset(queryset, search_term), False
+
+
+class CartItemFormSet(BaseInlineFormSet):
+    def clean(self):
+        # refuse quantities the cart can't hold rather than failing in save_related
+        super().clean()
+        wanted = {}
+        for form in self.forms:
+            data = getattr(form, "cleaned_data", None)
+            if data and not data.get("DELETE") and data.get("product"):
+                wanted[data["product"].pk] = wanted.get(data["product"].pk, 0) + data.get("quantity", 0)
+        if not wanted:
+            return
+        held = dict(
+            StockReservation.objects.filter(cart_id=self.instance.pk, product_id__in=wanted.keys())
+            .values_list("product_id", "quantity")
+        ) if self.instance.pk else {}
+        available = Product.objects.filter(pk__in=wanted.keys()).values_list("pk", F("stock") - F("reserved"))
+        short = sorted(pk for pk, free in available if wanted[pk] > free + held.get(pk, 0))
+        if short:
+            raise ValidationError(f"Insufficient stock for products {short}")
+
 
 class CartItemInline(admin.TabularInline):
     model = CartItem
+    formset = CartItemFormSet
     extra = 0
     readonly_fields = ('price',)
 
 
 @admin.register(Cart)
 class CartAdmin(admin.ModelAdmin):
-    list_display = ('id', 'user', 'session_key', 'created_at')
+    list_display = ('id', 'user', 'session_key', 'item_count', 'total_price', 'created_at')
+    readonly_fields = ('item_count', 'total_price')
     inlines = [CartItemInline]
 
+    def save_related(self, request, form, formsets, change):
+        cart = form.instance
+        before = set(cart.items.values_list('product_id', flat=True))
+        super().save_related(request, form, formsets, change)
+        # lines edited here are held (or released) like cart endpoint changes
+        reservations.sync(cart.pk, before | set(cart.items.values_list('product_id', flat=True)))
+        cart.refresh_summary()
+
 
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
@@ -33,8 +75,24 @@ class OrderItemInline(admin.TabularInline):
     readonly_fields = ('price', 'quantity',)
 
 
+class OrderEventInline(admin.TabularInline):
+    # append-only status history
+    model = OrderEvent
+    extra = 0
+    can_delete = False
+    readonly_fields = ('from_status', 'to_status', 'actor', 'created_at')
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     list_display = ('id', 'user', 'total_price', 'status', 'created_at')
     list_filter = ('status',)
-    inlines = [OrderItemInline]
+    inlines = [OrderItemInline, OrderEventInline]
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change and 'status' in form.changed_data:
+            changes.record_transition(obj, form.initial['status'], request.user)
@@ -0,0 +1,209 @@
+"""
+Daily sales rollups, maintained incrementally, and the reports read from them.
+
+Three counter tables are keyed by the day an order was placed:
+
+* ``DailySales`` (day, status): orders and revenue in each status;
+* ``DailyProductSales`` (day, product) and ``DailyCategorySales``
+  (day, category): orders, units and revenue of orders that aren't
+  cancelled.
+
+An order is folded in by ``apply_order``, queued as a job whenever an order
+is placed or changes status. ``Order.counted_status`` records the status the
+rollups currently count the order under; applying moves the order's
+contribution from that status to its current one with ``INSERT ... ON
+CONFLICT DO UPDATE SET n = n + excluded.n`` deltas. The swap of
+``counted_status`` is a conditional UPDATE done first, so a repeated or
+concurrent job for the same order finds nothing left to do: jobs are
+delivered at least once but orders are counted exactly once.
+
+Reports sum at most one row per day (and status, product or category), so
+their cost depends on the date range, not on how many orders there are.
+``rebuild`` recomputes everything from the order history, e.g. after
+upgrading an existing database.
+"""
+import datetime
+
+from django.db import connection, transaction
+from django.db.models import Count, DecimalField, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Order, OrderItem, DailySales, DailyProductSales, DailyCategorySales
+
+CANCELLED = "CANCELLED"
+
+_REVENUE = DecimalField(max_digits=14, decimal_places=2)
+
+
+def _add(model, key_columns, rows):
+    """
+    Add ``rows`` (tuples of key values followed by the counters, in column
+    order) to the model's counters, inserting missing keys, in one statement.
+    """
+    if not rows:
+        return
+    table = model._meta.db_table
+    counters = [f.column for f in model._meta.concrete_fields if f.column not in ("id", *key_columns)]
+    columns = [*key_columns, *counters]
+    values = ", ".join(["(" + ", ".join(["%s"] * len(columns)) + ")"] * len(rows))
+    updates = ", ".join(f"{c} = {table}.{c} + excluded.{c}" for c in counters)
+    sql = (
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES {values} "
+        f"ON CONFLICT ({', '.join(key_columns)}) DO UPDATE SET {updates}"
+    )
+    params = []
+    for row in rows:
+        for column, value in zip(columns, row):
+            field = model._meta.get_field(column.removesuffix("_id"))
+            params.append(field.get_db_prep_value(value, connection))
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def _sales(order_id):
+    """Per-product and per-category (orders, units, revenue) of one order's lines."""
+    lines = (
+        OrderItem.objects.filter(order_id=order_id)
+        .values_list("product_id", "product__category_id")
+        .annotate(units=Sum("quantity"), revenue=Sum(F("price") * F("quantity"), output_field=_REVENUE))
+        .order_by()
+    )
+    products, categories = {}, {}
+    for product_id, category_id, units, revenue in lines:
+        products[product_id] = (1, units, revenue)
+        o, u, r = categories.get(category_id, (0, 0, 0))
+        categories[category_id] = (1, u + units, r + revenue)
+    return products, categories
+
+
+@transaction.atomic
+def apply_order(order_id):
+    """Bring the rollups in line with the order's current status. Returns True if anything moved."""
+    order = Order.objects.filter(pk=order_id).values("status", "counted_status", "created_at", "total_price").first()
+    if order is None or order["status"] == order["counted_status"]:
+        return False
+    old, new = order["counted_status"], order["status"]
+    # claim the transition; a concurrent or repeated apply loses here and changes nothing
+    if not Order.objects.filter(pk=order_id, counted_status=old).update(counted_status=new):
+        return False
+
+    day = timezone.localdate(order["created_at"])
+    total = order["total_price"]
+    status_rows = [(day, new, 1, total)]
+    if old is not None:
+        status_rows.append((day, old, -1, -total))
+    _add(DailySales, ["day", "status"], status_rows)
+
+    was_sale, is_sale = old not in (None, CANCELLED), new != CANCELLED
+    if was_sale != is_sale:
+        sign = 1 if is_sale else -1
+        products, categories = _sales(order_id)
+        for model, key, counts in (
+            (DailyProductSales, "product_id", products),
+            (DailyCategorySales, "category_id", categories),
+        ):
+            _add(model, ["day", key], [
+                (day, pk, sign * o, sign * u, sign * r) for pk, (o, u, r) in counts.items()
+            ])
+    return True
+
+
+@transaction.atomic
+def rebuild():
+    """Recompute all rollups from the order history. Run while no orders are being written."""
+    for model in (DailySales, DailyProductSales, DailyCategorySales):
+        model.objects.all().delete()
+
+    by_status = (
+        Order.objects.annotate(day=TruncDate("created_at")).values("day", "status")
+        .annotate(orders=Count("id"), revenue=Sum("total_price")).order_by()
+    )
+    DailySales.objects.bulk_create((DailySales(**row) for row in by_status.iterator()), batch_size=1000)
+
+    sales = OrderItem.objects.exclude(order__status=CANCELLED).annotate(day=TruncDate("order__created_at"))
+    for model, field, lookup in (
+        (DailyProductSales, "product_id", "product_id"),
+        (DailyCategorySales, "category_id", "product__category_id"),
+    ):
+        rows = sales.values_list("day", lookup).annotate(
+            orders=Count("order_id", distinct=True),
+            units=Sum("quantity"),
+            revenue=Sum(F("price") * F("quantity"), output_field=_REVENUE),
+        ).order_by()
+        model.objects.bulk_create(
+            (
+                model(day=day, orders=orders, units=units, revenue=revenue, **{field: pk})
+                for day, pk, orders, units, revenue in rows.iterator()
+            ),
+            batch_size=1000,
+        )
+
+    Order.objects.update(counted_status=F("status"))
+
+
+# ---------- reports ----------
+
+DEFAULT_DAYS = 30
+TOP_LIMIT = 20
+
+
+def parse_range(since=None, until=None):
+    """
+    Inclusive ``(since, until)`` dates from ISO date strings; defaults to
+    the last ``DEFAULT_DAYS`` days. Raises ValueError.
+    """
+    try:
+        until = datetime.date.fromisoformat(until) if until else timezone.localdate()
+        since = datetime.date.fromisoformat(since) if since else until - datetime.timedelta(days=DEFAULT_DAYS - 1)
+    except ValueError:
+        raise ValueError("Dates must be YYYY-MM-DD")
+    if since > until:
+        raise ValueError("since is after until")
+    return since, until
+
+
+def daily_report(since, until):
+    """
+    Per-day orders and revenue (cancelled orders excluded) with the status
+    breakdown, plus totals for the range. Days without orders are omitted.
+    """
+    days = {}
+    totals = {"orders": 0, "revenue": 0, "statuses": {}}
+    rows = DailySales.objects.filter(day__range=(since, until)).order_by("day", "status")
+    for day, status, orders, revenue in rows.values_list("day", "status", "orders", "revenue"):
+        if not orders:
+            continue
+        entry = days.setdefault(day, {"day": day, "orders": 0, "revenue": 0, "statuses": {}})
+        for target in (entry, totals):
+            counts = target["statuses"].setdefault(status, {"orders": 0, "revenue": 0})
+            counts["orders"] += orders
+            counts["revenue"] += revenue
+            if status != CANCELLED:
+                target["orders"] += orders
+                target["revenue"] += revenue
+    return {"since": since, "until": until, "totals": totals, "days": list(days.values())}
+
+
+def top_report(dimension, since, until, limit=TOP_LIMIT):
+    """Products or categories ranked by revenue over the range."""
+    model, key, name = {
+        "products": (DailyProductSales, "product_id", "product__name"),
+        "categories": (DailyCategorySales, "category_id", "category__name"),
+    }[dimension]
+    rows = (
+        model.objects.filter(day__range=(since, until))
+        .values(key, name)
+        .annotate(total_orders=Sum("orders"), total_units=Sum("units"), total_revenue=Sum("revenue"))
+        .filter(total_orders__gt=0)
+        .order_by("-total_revenue", key)[:limit]
+    )
+    return {
+        "since": since,
+        "until": until,
+        "results": [
+            {"id": row[key], "name": row[name], "orders": row["total_orders"], "units": row["total_units"],
+             "revenue": row["total_revenue"]}
+            for row in rows
+        ],
+    }
@@ -0,0 +1,169 @@
+"""
+ASGI-native read path for the hot store endpoints.
+
+DRF views are synchronous, so under ASGI every request to them holds a
+worker thread for its whole duration. These plain ``async def`` views serve
+the same payloads without that: the catalog and cart-id caches are read
+through their async APIs, queries go through Django's async ORM (``aget``,
+``afirst``, ``async for``), and only CPU-bound serialization runs on the
+event loop. They are mounted under ``/api/store/async/`` next to the DRF
+endpoints and render JSON only; writes stay on the DRF viewsets.
+
+Query and response shapes match the sync endpoints (including ``?fields=``,
+``?expand=``, ``?q=``, keyset cursors and conditional GET), so clients can
+switch prefixes without other changes.
+"""
+import functools
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views.decorators.http import require_safe
+from rest_framework.request import Request
+from rest_framework.exceptions import AuthenticationFailed
+
+from config.renderers import FastJSONRenderer
+from core.authentication import CachedJWTAuthentication
+from .models import Category, Product, Cart, Order
+from .pagination import KeysetPagination
+from .fast_serializers import product_values, serialize_products
+from .sparse import parse_paths
+from .carts import aget_cart_id
+from .cache import catalog_cache, request_key
+from .conditional import (
+    aconditional,
+    category_list_version,
+    product_list_version,
+    product_detail_version,
+    cart_version,
+)
+from . import search
+from .serializers import CategorySerializer, CartSerializer, CartSummarySerializer, OrderSerializer
+
+_renderer = FastJSONRenderer()
+
+
+def render(data, status=200, headers=None):
+    return HttpResponse(
+        _renderer.render(data), status=status, headers=headers, content_type="application/json"
+    )
+
+
+# ---------- authentication ----------
+async def authenticate(request):
+    """
+    Resolve the JWT bearer user the way the DRF endpoints do. Token
+    validation is pure CPU and the user normally comes from the auth user
+    cache, so only a cold cache touches the database.
+    """
+    auth = CachedJWTAuthentication()
+    header = auth.get_header(request)
+    raw_token = auth.get_raw_token(header) if header else None
+    if raw_token is None:
+        return None
+    return await auth.aget_user(auth.get_validated_token(raw_token))
+
+
+def authenticated(view_func):
+    @functools.wraps(view_func)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            user = await authenticate(request)
+        except AuthenticationFailed as exc:  # InvalidToken included
+            detail = exc.detail if isinstance(exc.detail, dict) else {"detail": exc.detail}
+            return render(detail, status=401, headers={"WWW-Authenticate": 'Bearer realm="api"'})
+        if user is None:
+            return render(
+                {"detail": "Authentication credentials were not provided."},
+                status=401, headers={"WWW-Authenticate": 'Bearer realm="api"'},
+            )
+        request.user = user
+        return await view_func(request, *args, **kwargs)
+    return wrapper
+
+
+def cached_catalog(view_func):
+    """Async ``cache_catalog_response``: the payload is cached, not the rendered bytes."""
+    @functools.wraps(view_func)
+    async def wrapper(request, *args, **kwargs):
+        key = request_key(request)
+        data = await catalog_cache.aget(key)
+        if data is not None:
+            return render(data, headers={"X-Cache": "HIT"})
+        data, status = await view_func(request, *args, **kwargs)
+        if status != 200:
+            return render(data, status=status)
+        await catalog_cache.aset(key, data)
+        return render(data, headers={"X-Cache": "MISS"})
+    return wrapper
+
+
+# ---------- CATEGORY ----------
+@require_safe
+@aconditional(category_list_version)
+@cached_catalog
+async def category_list(request):
+    categories = [c async for c in Category.objects.order_by("name")]
+    return CategorySerializer(categories, many=True).data, 200
+
+
+# ---------- PRODUCT ----------
+_active_products = Product.objects.filter(is_active=True).order_by("-created_at", "-id")
+
+
+@require_safe
+@aconditional(product_list_version)
+@cached_catalog
+async def product_list(request):
+    fields = parse_paths(request, "fields")
+    rows = product_values(_active_products, fields)
+    paginator = KeysetPagination()
+    drf_request = Request(request)
+    q = request.GET.get("q", "").strip()
+    if q:
+        # ranked search runs raw FTS queries, so it stays on the sync connection
+        limit = paginator.get_page_size(drf_request)
+        products = await sync_to_async(search.search)(rows, q, limit)
+        return {"next": None, "previous": None, "results": serialize_products(products, request, fields)}, 200
+
+    # the paginator issues exactly one query for the page; run it where the async ORM would
+    page = await sync_to_async(paginator.paginate_queryset)(rows, drf_request)
+    return paginator.get_paginated_response(serialize_products(page, request, fields)).data, 200
+
+
+@require_safe
+@aconditional(product_detail_version)
+@cached_catalog
+async def product_detail(request, pk):
+    fields = parse_paths(request, "fields")
+    row = await product_values(_active_products, fields).filter(pk=pk).afirst()
+    if row is None:
+        return {"detail": "No Product matches the given query."}, 404
+    return serialize_products([row], request, fields)[0], 200
+
+
+# ---------- CART ----------
+@require_safe
+@authenticated
+@aconditional(cart_version)
+async def cart_detail(request):
+    if request.GET.get("summary") in ("1", "true"):
+        cart_id = await aget_cart_id(request.user, create=False)
+        cart = await Cart.objects.only("id", "item_count", "total_price").filter(pk=cart_id).afirst()
+        return render(CartSummarySerializer(cart or Cart()).data)
+
+    context = {"request": request}
+    cart_id = await aget_cart_id(request.user)
+    cart = await CartSerializer.setup_eager_loading(Cart.objects.filter(pk=cart_id), context).aget()
+    return render(CartSerializer(cart, context=context).data)
+
+
+# ---------- ORDER ----------
+@require_safe
+@authenticated
+async def order_list(request):
+    context = {"request": request}
+    queryset = OrderSerializer.setup_eager_loading(
+        Order.objects.filter(user=request.user).order_by("-created_at"), context
+    )
+    orders = [order async for order in queryset]
+    return render(OrderSerializer(orders, many=True, context=context).data)
@@ -0,0 +1,214 @@
+"""
+Versioned response cache for the anonymous catalog endpoints.
+
+Cached payloads are keyed by ``<generation>:<path>?<sorted query params>``.
+Any write to a product or category bumps the generation (see
+``store.signals``), which orphans every existing entry at once instead of
+hunting down the keys it affected; orphans simply age out of the LRU.
+
+Two tiers:
+
+* an in-process LRU bounded by ``MAX_ENTRIES``;
+* an optional shared tier in the Django cache named by ``SHARED_ALIAS``,
+  which also holds the generation counter so every worker sees a bump.
+
+Entries in both tiers expire after ``TIMEOUT`` seconds. Without a shared
+tier the generation lives in-process, so another worker's writes are only
+picked up when the entry expires; that is the staleness bound for
+multi-process deployments without ``SHARED_ALIAS``.
+"""
+import functools
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+from config.options import merged
+
+GENERATION_KEY = "store:catalog:generation"
+
+DEFAULTS = {
+    "MAX_ENTRIES": 512,
+    "SHARED_ALIAS": None,
+    "TIMEOUT": 300,
+}
+
+
+class CatalogCache:
+    timer = time.monotonic
+
+    def __init__(self, max_entries, shared_alias=None, timeout=300):
+        self.max_entries = max_entries
+        self.shared_alias = shared_alias
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._local = OrderedDict()
+        self._generation = 1
+        self._stats = {"local_hits": 0, "shared_hits": 0, "misses": 0, "invalidations": 0}
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias] if self.shared_alias else None
+
+    # ---------- generation ----------
+    def generation(self):
+        if self.shared is None:
+            return self._generation
+        self.shared.add(GENERATION_KEY, 1, timeout=None)
+        return self.shared.get(GENERATION_KEY, 1)
+
+    async def ageneration(self):
+        if self.shared is None:
+            return self._generation
+        await self.shared.aadd(GENERATION_KEY, 1, timeout=None)
+        return await self.shared.aget(GENERATION_KEY, 1)
+
+    def bump(self):
+        """Invalidate every cached catalog response."""
+        with self._lock:
+            self._generation += 1
+            self._local.clear()
+            self._stats["invalidations"] += 1
+        self._bump_shared()
+
+    def invalidate(self):
+        """
+        Bump now, so the writing request never reads its own stale entries,
+        and again on commit: a reader that raced the transaction may have
+        cached the pre-commit rows under the first new generation.
+        """
+        self.bump()
+        if transaction.get_connection().in_atomic_block:
+            transaction.on_commit(self.bump)
+
+    # ---------- entries ----------
+    def get(self, key):
+        key = f"{self.generation()}:{key}"
+        value = self._get_local(key)
+        if value is not None:
+            return value
+        if self.shared is not None:
+            value = self.shared.get(f"store:catalog:{key}")
+            if value is not None:
+                self._store_local(key, value)
+                self._count("shared_hits")
+                return value
+        self._count("misses")
+        return None
+
+    def set(self, key, value):
+        key = f"{self.generation()}:{key}"
+        self._store_local(key, value)
+        if self.shared is not None:
+            self.shared.set(f"store:catalog:{key}", value, timeout=self.timeout)
+
+    # async variants for the ASGI read path; the local tier never blocks,
+    # only the shared tier goes through the cache backend's async API
+    async def aget(self, key):
+        key = f"{await self.ageneration()}:{key}"
+        value = self._get_local(key)
+        if value is not None:
+            return value
+        if self.shared is not None:
+            value = await self.shared.aget(f"store:catalog:{key}")
+            if value is not None:
+                self._store_local(key, value)
+                self._count("shared_hits")
+                return value
+        self._count("misses")
+        return None
+
+    async def aset(self, key, value):
+        key = f"{await self.ageneration()}:{key}"
+        self._store_local(key, value)
+        if self.shared is not None:
+            await self.shared.aset(f"store:catalog:{key}", value, timeout=self.timeout)
+
+    def clear(self):
+        """Drop all entries and reset the counters."""
+        with self._lock:
+            self._generation += 1
+            self._local.clear()
+            for name in self._stats:
+                self._stats[name] = 0
+        self._bump_shared()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats, entries=len(self._local))
+        lookups = stats["local_hits"] + stats["shared_hits"] + stats["misses"]
+        stats["hit_rate"] = (lookups - stats["misses"]) / lookups if lookups else 0.0
+        return stats
+
+    def _bump_shared(self):
+        if self.shared is None:
+            return
+        try:
+            self.shared.incr(GENERATION_KEY)
+        except ValueError:
+            self.shared.set(GENERATION_KEY, 2, timeout=None)
+
+    def _get_local(self, key):
+        with self._lock:
+            if key in self._local:
+                expires_at, value = self._local[key]
+                if expires_at is not None and expires_at <= self.timer():
+                    del self._local[key]
+                    return None
+                self._local.move_to_end(key)
+                self._stats["local_hits"] += 1
+                return value
+        return None
+
+    def _store_local(self, key, value):
+        expires_at = None if self.timeout is None else self.timer() + self.timeout
+        with self._lock:
+            self._local[key] = (expires_at, value)
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+
+def options():
+    return merged("STORE_CATALOG_CACHE", DEFAULTS)
+
+
+def _build_cache():
+    opts = options()
+    return CatalogCache(opts["MAX_ENTRIES"], opts["SHARED_ALIAS"], opts["TIMEOUT"])
+
+
+catalog_cache = _build_cache()
+
+
+def request_key(request):
+    params = sorted(getattr(request, "query_params", request.GET).lists())
+    query = "&".join(f"{name}={value}" for name, values in params for value in values)
+    return f"{request.path}?{query}"
+
+
+def cache_catalog_response(view_method):
+    """
+    Serve a viewset action from ``catalog_cache``. Only successful responses
+    are cached; the payload is stored before rendering so content negotiation
+    still happens per request.
+    """
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request_key(request)
+        data = catalog_cache.get(key)
+        if data is not None:
+            return Response(data, headers={"X-Cache": "HIT"})
+        response = view_method(self, request, *args, **kwargs)
+        if response.status_code == 200:
+            catalog_cache.set(key, response.data)
+            response["X-Cache"] = "MISS"
+        return response
+    return wrapper
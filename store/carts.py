@@ -0,0 +1,132 @@
+"""
+Cart storage primitives shared by the cart endpoints.
+
+Cart items are written with ``INSERT ... SELECT ... ON CONFLICT (cart_id,
+product_id) DO UPDATE`` so an add is a single statement: the product lookup
+(existence and price snapshot) happens inside the insert, and concurrent
+adds of the same product merge in the database instead of racing on the
+``unique_together`` constraint. Supported by SQLite (3.24+) and PostgreSQL.
+"""
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Cart, CartItem
+
+CART_ID_KEY = "store:cart-id:{}"
+CART_ID_TIMEOUT = 60 * 60 * 24
+
+ADD = "add"
+SET = "set"
+REMOVE = "remove"
+
+_ON_CONFLICT = {
+    # merge a repeated add into the existing line
+    ADD: "quantity = {table}.quantity + excluded.quantity",
+    # overwrite the line's quantity
+    SET: "quantity = excluded.quantity",
+}
+
+
+def get_cart_id(user, create=True):
+    """
+    Resolve the user's cart id, caching the user -> cart mapping so cart
+    requests don't start with a get_or_create. Returns None if the user has
+    no cart and ``create`` is false.
+    """
+    key = CART_ID_KEY.format(user.pk)
+    cart_id = cache.get(key)
+    if cart_id is not None:
+        return cart_id
+    cart_id = Cart.objects.filter(user=user).order_by("pk").values_list("pk", flat=True).first()
+    if cart_id is None:
+        if not create:
+            return None
+        cart_id = Cart.objects.create(user=user).pk
+        # a request that rolls back (e.g. out of stock) takes the new cart with it
+        transaction.on_commit(lambda: cache.set(key, cart_id, CART_ID_TIMEOUT))
+        return cart_id
+    cache.set(key, cart_id, CART_ID_TIMEOUT)
+    return cart_id
+
+
+async def aget_cart_id(user, create=True):
+    """Async counterpart of ``get_cart_id`` for the ASGI read path."""
+    key = CART_ID_KEY.format(user.pk)
+    cart_id = await cache.aget(key)
+    if cart_id is not None:
+        return cart_id
+    cart_id = await Cart.objects.filter(user=user).order_by("pk").values_list("pk", flat=True).afirst()
+    if cart_id is None:
+        if not create:
+            return None
+        cart_id = (await Cart.objects.acreate(user=user)).pk
+    await cache.aset(key, cart_id, CART_ID_TIMEOUT)
+    return cart_id
+
+
+def forget_cart_id(user_id):
+    cache.delete(CART_ID_KEY.format(user_id))
+
+
+def fold_operations(operations):
+    """
+    Collapse a list of ``{product_id, quantity, action}`` operations, applied
+    in order, into at most one outcome per product and return three buckets:
+    ``(adds, sets, removals)``. ``adds``/``sets`` map product id to quantity.
+    """
+    final = {}
+    for op in operations:
+        pk, quantity, action = op["product_id"], op["quantity"], op["action"]
+        previous = final.get(pk)
+        if action == REMOVE or (action == SET and quantity == 0):
+            final[pk] = (REMOVE, 0)
+        elif action == SET:
+            final[pk] = (SET, quantity)
+        elif previous is None:
+            final[pk] = (ADD, quantity)
+        elif previous[0] == REMOVE:
+            # the line was removed earlier in this batch, so it restarts from zero
+            final[pk] = (SET, quantity)
+        else:
+            final[pk] = (previous[0], previous[1] + quantity)
+
+    adds, sets, removals = {}, {}, []
+    for pk, (action, quantity) in final.items():
+        if action == ADD:
+            if quantity:
+                adds[pk] = quantity
+        elif action == SET:
+            sets[pk] = quantity
+        else:
+            removals.append(pk)
+    return adds, sets, removals
+
+
+def upsert_items(cart_id, quantities, mode=ADD):
+    """
+    Write ``{product_id: quantity}`` into the cart in one statement and
+    return the number of lines written. Unknown product ids are skipped by
+    the join, so a short count means some ids didn't exist.
+    """
+    if not quantities:
+        return 0
+    table = CartItem._meta.db_table
+    product_table = CartItem._meta.get_field("product").related_model._meta.db_table
+    ids = list(quantities)
+    quantity_case = " ".join(["WHEN %s THEN %s"] * len(ids))
+    placeholders = ", ".join(["%s"] * len(ids))
+    sql = (
+        f"INSERT INTO {table} (cart_id, product_id, quantity, price, added_at) "
+        f"SELECT %s, p.id, CASE p.id {quantity_case} END, p.price, %s "
+        f"FROM {product_table} p WHERE p.id IN ({placeholders}) "
+        f"ON CONFLICT (cart_id, product_id) DO UPDATE SET {_ON_CONFLICT[mode].format(table=table)}"
+    )
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    params = [cart_id]
+    for pk in ids:
+        params += [pk, quantities[pk]]
+    params += [now, *ids]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
@@ -0,0 +1,169 @@
+"""
+Conditional GET support (ETag / Last-Modified) for store endpoints.
+
+Each validator answers "which version of this resource would the view
+render?" with one cheap aggregate query, without touching the serializers.
+``If-None-Match``/``If-Modified-Since`` matches then short-circuit to a 304
+before the view runs.
+"""
+import functools
+import hashlib
+
+from asgiref.sync import sync_to_async
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .cache import catalog_cache, request_key
+from .carts import get_cart_id
+from .models import Category, Product, Cart
+
+
+def _validators(request, version, media_type):
+    # the same rows render differently per URL (page, filters) and per media type
+    source = "|".join(map(str, (request_key(request), media_type, *version)))
+    etag = '"%s"' % hashlib.sha1(source.encode()).hexdigest()
+    modified = version[-1]
+    return etag, int(modified.timestamp()) if modified else None
+
+
+def _set_validators(response, etag, last_modified):
+    if response.status_code in (200, 304):
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+    return response
+
+
+def conditional(validator):
+    """
+    Decorate a viewset action with conditional GET handling.
+
+    ``validator(view, request, *args, **kwargs)`` returns a tuple of values
+    that change whenever the response body would, the last of which is the
+    newest modification time; or ``None`` to skip conditional handling (e.g.
+    the object doesn't exist and the view will 404).
+    """
+    def decorator(view_method):
+        @functools.wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view_method(self, request, *args, **kwargs)
+            version = validator(self, request, *args, **kwargs)
+            if version is None:
+                return view_method(self, request, *args, **kwargs)
+
+            etag, last_modified = _validators(request, version, request.accepted_media_type)
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = view_method(self, request, *args, **kwargs)
+            return _set_validators(response, etag, last_modified)
+        return wrapper
+    return decorator
+
+
+def aconditional(validator, media_type="application/json"):
+    """
+    ``conditional`` for the async views in ``store.async_views``. Validators
+    are shared with the sync endpoints and run in the ORM's worker thread
+    (called with ``view=None``), except that memoized catalog versions are
+    read straight from the cache; the async views only render JSON.
+    """
+    def decorator(view_func):
+        @functools.wraps(view_func)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return await view_func(request, *args, **kwargs)
+            avalidator = getattr(validator, "asynchronous", None) or sync_to_async(validator)
+            version = await avalidator(None, request, *args, **kwargs)
+            if version is None:
+                return await view_func(request, *args, **kwargs)
+
+            etag, last_modified = _validators(request, version, media_type)
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = await view_func(request, *args, **kwargs)
+            return _set_validators(response, etag, last_modified)
+        return wrapper
+    return decorator
+
+
+def _newest(*timestamps):
+    timestamps = [t for t in timestamps if t is not None]
+    return max(timestamps) if timestamps else None
+
+
+def catalog_version(validator):
+    """
+    Memoize a catalog validator in ``catalog_cache``: every write that could
+    change the version already bumps the cache generation, so a warm
+    conditional GET on the catalog costs no queries at all.
+    """
+    def cache_key(kwargs):
+        return f"version:{validator.__name__}:{kwargs.get('pk', '')}"
+
+    @functools.wraps(validator)
+    def wrapper(view, request, *args, **kwargs):
+        key = cache_key(kwargs)
+        version = catalog_cache.get(key)
+        if version is None:
+            version = validator(view, request, *args, **kwargs)
+            if version is not None:
+                catalog_cache.set(key, version)
+        return version
+
+    async def awrapper(view, request, *args, **kwargs):
+        # a warm version is served without leaving the event loop
+        version = await catalog_cache.aget(cache_key(kwargs))
+        if version is None:
+            version = await sync_to_async(wrapper)(view, request, *args, **kwargs)
+        return version
+
+    wrapper.asynchronous = awrapper
+    return wrapper
+
+
+# ---------- validators ----------
+
+@catalog_version
+def category_list_version(view, request, *args, **kwargs):
+    agg = Category.objects.aggregate(count=Count("id"), modified=Max("updated_at"))
+    return agg["count"], agg["modified"]
+
+
+@catalog_version
+def product_list_version(view, request, *args, **kwargs):
+    # categories are nested in every product, so a rename must change the tag too
+    products = Product.objects.filter(is_active=True).aggregate(count=Count("id"), modified=Max("updated_at"))
+    categories = Category.objects.aggregate(modified=Max("updated_at"))
+    return products["count"], _newest(products["modified"], categories["modified"])
+
+
+@catalog_version
+def product_detail_version(view, request, pk=None, *args, **kwargs):
+    row = Product.objects.filter(pk=pk, is_active=True).values_list(
+        "updated_at", "category__updated_at"
+    ).first()
+    if row is None:
+        return None
+    return (_newest(*row),)
+
+
+def cart_version(view, request, *args, **kwargs):
+    cart_id = get_cart_id(request.user, create=False)
+    if cart_id is None:
+        return None
+    row = (
+        Cart.objects.filter(pk=cart_id)
+        .annotate(
+            products_modified=Max("items__product__updated_at"),
+            categories_modified=Max("items__product__category__updated_at"),
+        )
+        .values_list("pk", "updated_at", "products_modified", "categories_modified")
+        .first()
+    )
+    if row is None:
+        return None
+    pk, *timestamps = row
+    return pk, _newest(*timestamps)
@@ -0,0 +1,128 @@
+"""
+Read-only fast path for product payloads.
+
+Builds the exact output of ``ProductSerializer`` straight from ``.values()``
+rows joined with the category, skipping model instantiation and DRF's
+per-field machinery. ``store.tests.FastProductSerializerTests`` asserts the
+rendered JSON is byte-identical to the serializer's, so any change to
+``ProductSerializer`` has to be mirrored here. Assumes DRF's default
+``COERCE_DECIMAL_TO_STRING`` and ISO 8601 ``DATETIME_FORMAT``.
+"""
+from decimal import Decimal
+
+from django.utils import timezone
+
+from .models import Product
+from .sparse import selected, sparse_dict
+
+PRODUCT_VALUES = (
+    "id",
+    "name",
+    "slug",
+    "description",
+    "price",
+    "stock",
+    "image",
+    "is_active",
+    "category_id",
+    "category__name",
+    "category__slug",
+    "created_at",
+    "updated_at",
+)
+
+# key order of ProductSerializer's output
+PRODUCT_OUTPUT_FIELDS = (
+    "id", "name", "slug", "description", "price", "stock", "image",
+    "is_active", "category", "created_at", "updated_at",
+)
+
+_CENTS = Decimal("0.01")
+_image_storage = Product._meta.get_field("image").storage
+
+
+# output field -> columns it is built from, for narrowing the SELECT under ?fields=
+FIELD_COLUMNS = {
+    "category": ("category_id", "category__name", "category__slug"),
+}
+# the keyset paginator reads these from every row
+ALWAYS_SELECTED = ("id", "created_at")
+
+
+def product_values(queryset, fields=None):
+    """Narrow a product queryset to the columns the fast path (and ?fields=) needs."""
+    names = selected(fields, "")
+    if names is None:
+        return queryset.values(*PRODUCT_VALUES)
+    columns = dict.fromkeys(ALWAYS_SELECTED)
+    for name in names:
+        for column in FIELD_COLUMNS.get(name, (name,)):
+            if column in PRODUCT_VALUES:
+                columns[column] = None
+    return queryset.values(*columns)
+
+
+def _datetime(value, tz):
+    if not value:
+        return None
+    value = value.astimezone(tz).isoformat()
+    if value.endswith("+00:00"):
+        value = value[:-6] + "Z"
+    return value
+
+
+def _image(name, request):
+    if not name:
+        return None
+    url = _image_storage.url(name)
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def serialize_product_row(row, request=None, tz=None):
+    tz = tz or timezone.get_current_timezone()
+    return {
+        "id": row["id"],
+        "name": row["name"],
+        "slug": row["slug"],
+        "description": row["description"],
+        "price": f"{row['price'].quantize(_CENTS):f}",
+        "stock": row["stock"],
+        "image": _image(row["image"], request),
+        "is_active": row["is_active"],
+        "category": {
+            "id": row["category_id"],
+            "name": row["category__name"],
+            "slug": row["category__slug"],
+        },
+        "created_at": _datetime(row["created_at"], tz),
+        "updated_at": _datetime(row["updated_at"], tz),
+    }
+
+
+def serialize_sparse_product_row(row, fields, request=None, tz=None):
+    """Build only the ``?fields=`` selection from a row narrowed by product_values()."""
+    tz = tz or timezone.get_current_timezone()
+    names = selected(fields, "")
+    out = {}
+    for name in PRODUCT_OUTPUT_FIELDS:
+        if name not in names:
+            continue
+        if name == "price":
+            out[name] = f"{row['price'].quantize(_CENTS):f}"
+        elif name == "image":
+            out[name] = _image(row["image"], request)
+        elif name == "category":
+            category = {"id": row["category_id"], "name": row["category__name"], "slug": row["category__slug"]}
+            out[name] = sparse_dict(category, fields, "category")
+        elif name in ("created_at", "updated_at"):
+            out[name] = _datetime(row[name], tz)
+        else:
+            out[name] = row[name]
+    return out
+
+
+def serialize_products(rows, request=None, fields=None):
+    tz = timezone.get_current_timezone()
+    if selected(fields, "") is None:
+        return [serialize_product_row(row, request, tz) for row in rows]
+    return [serialize_sparse_product_row(row, fields, request, tz) for row in rows]
@@ -0,0 +1,208 @@
+"""
+Bulk product import from CSV or JSONL.
+
+The file is read once, as a stream, and products are upserted in batches
+with ``bulk_create(update_conflicts=True)`` on ``slug``:
+
+* a row's slug is its ``slug`` column, or ``slugify(name)``; repeats within
+  the file get ``-2``, ``-3``... suffixes, so re-importing the same file
+  updates the same products instead of duplicating them, and no per-row
+  existence query is needed. A suffixed slug already taken by a product
+  with another name (an unrelated "Widget 2") is skipped, checked with one
+  query per repeated slug;
+* categories are looked up by name in a map loaded once; unknown names are
+  created together, once per batch;
+* only the columns present in the first record are written on conflict, so
+  a price/stock feed doesn't blank descriptions.
+
+Signals don't fire for bulk writes, so each batch reindexes its products
+for search and bumps the catalog cache itself.
+"""
+import csv
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils.text import slugify
+
+from . import search
+from .cache import catalog_cache
+from .models import Category, Product
+
+BATCH_SIZE = 1000
+
+FIELDS = ("name", "slug", "category", "description", "price", "stock", "is_active")
+REQUIRED = ("name", "category", "price")
+
+_SLUG_MAX = Product._meta.get_field("slug").max_length
+_PRICE = Product._meta.get_field("price")
+_PRICE_LIMIT = Decimal(10) ** (_PRICE.max_digits - _PRICE.decimal_places)
+_TRUE = {"1", "true", "yes", "y", "t", ""}
+_FALSE = {"0", "false", "no", "n", "f"}
+
+
+class RowError(ValueError):
+    pass
+
+
+def read_records(stream, fmt):
+    """
+    Yield dicts from a CSV (with header) or JSONL text stream. A JSONL line
+    that isn't a JSON object is yielded as a RowError, so it is reported
+    and skipped like any other bad row.
+    """
+    if fmt == "csv":
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as exc:
+            yield RowError(f"invalid JSON: {exc.msg}")
+            continue
+        yield record if isinstance(record, dict) else RowError("not a JSON object")
+
+
+def _decimal(value):
+    try:
+        price = Decimal(str(value).strip()).quantize(Decimal("0.01"))
+    except InvalidOperation:
+        raise RowError(f"invalid price {value!r}")
+    if not price.is_finite() or not 0 <= price < _PRICE_LIMIT:
+        raise RowError(f"invalid price {value!r}")
+    return price
+
+
+def _int(value):
+    try:
+        stock = int(str(value).strip() or 0)
+    except ValueError:
+        raise RowError(f"invalid stock {value!r}")
+    if stock < 0:
+        raise RowError(f"invalid stock {value!r}")
+    return stock
+
+
+def _bool(value):
+    if isinstance(value, bool):
+        return value
+    if value is None:
+        return True
+    text = str(value).strip().lower()
+    if text in _TRUE:
+        return True
+    if text in _FALSE:
+        return False
+    raise RowError(f"invalid is_active {value!r}")
+
+
+class ProductImporter:
+    def __init__(self, batch_size=BATCH_SIZE):
+        self.batch_size = batch_size
+        self.categories = dict(Category.objects.values_list("name", "id"))
+        self.category_slugs = set(Category.objects.values_list("slug", flat=True))
+        self.used_slugs = set()
+        self.existing = {}  # repeated base slug -> {slug: name} of products that may clash with its suffixes
+        self.update_fields = None
+        self.imported = 0
+        self.errors = []  # (record number, message)
+
+    def run(self, records, progress=None):
+        """Import ``records``; ``progress(imported)`` is called after each batch."""
+        batch = []
+        for number, record in enumerate(records, start=1):
+            try:
+                if isinstance(record, RowError):
+                    raise record
+                if self.update_fields is None:
+                    self.update_fields = self._update_fields(record)
+                batch.append(self.clean(record))
+            except RowError as exc:
+                self.errors.append((number, str(exc)))
+                continue
+            if len(batch) >= self.batch_size:
+                self.write(batch)
+                batch = []
+                if progress:
+                    progress(self.imported)
+        if batch:
+            self.write(batch)
+            if progress:
+                progress(self.imported)
+        return self.imported
+
+    @staticmethod
+    def _update_fields(record):
+        return sorted({f for f in record if f in FIELDS and f != "slug"} | {"updated_at"})
+
+    def clean(self, record):
+        missing = [f for f in REQUIRED if not str(record.get(f) or "").strip()]
+        if missing:
+            raise RowError(f"missing {', '.join(missing)}")
+        name = str(record["name"]).strip()
+        row = {
+            "name": name,
+            "category": str(record["category"]).strip(),
+            "description": str(record.get("description") or ""),
+            "price": _decimal(record["price"]),
+            "stock": _int(record.get("stock", 0)),
+            "is_active": _bool(record.get("is_active", True)),
+        }
+        row["slug"] = self.unique_slug(str(record.get("slug") or "").strip() or slugify(name), name)
+        return row
+
+    def unique_slug(self, base, name):
+        """
+        ``base``, or the first free suffixed form of it. A suffixed slug may
+        only reuse an existing product of the same name, i.e. the one an
+        earlier import of this file created.
+        """
+        base = base[:_SLUG_MAX] or "product"
+        slug, n = base, 1
+        while slug in self.used_slugs or (n > 1 and self._taken(base, slug, name)):
+            n += 1
+            suffix = f"-{n}"
+            slug = base[:_SLUG_MAX - len(suffix)] + suffix
+        self.used_slugs.add(slug)
+        return slug
+
+    def _taken(self, base, slug, name):
+        if base not in self.existing:
+            # every suffixed form starts with this, however far the base is cut for it
+            prefix = base[:_SLUG_MAX - 8]
+            self.existing[base] = dict(Product.objects.filter(slug__startswith=prefix).values_list("slug", "name"))
+        return self.existing[base].get(slug, name) != name
+
+    def resolve_categories(self, names):
+        new = []
+        for name in dict.fromkeys(names):
+            if name in self.categories:
+                continue
+            base = slugify(name) or "category"
+            slug, n = base, 1
+            while slug in self.category_slugs:
+                n += 1
+                slug = f"{base}-{n}"
+            self.category_slugs.add(slug)
+            new.append(Category(name=name, slug=slug))
+        for category in Category.objects.bulk_create(new):
+            self.categories[category.name] = category.pk
+
+    @transaction.atomic
+    def write(self, rows):
+        self.resolve_categories(row["category"] for row in rows)
+        products = [Product(category_id=self.categories[row.pop("category")], **row) for row in rows]
+        Product.objects.bulk_create(
+            products,
+            update_conflicts=True,
+            unique_fields=["slug"],
+            update_fields=self.update_fields,
+        )
+        ids = [p.pk for p in products if p.pk is not None]
+        if len(ids) < len(products):
+            ids = list(Product.objects.filter(slug__in=[p.slug for p in products]).values_list("pk", flat=True))
+        search.index_products(ids)
+        catalog_cache.invalidate()
+        self.imported += len(products)
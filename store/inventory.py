@@ -0,0 +1,208 @@
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, IntegerField, Value, When
+from django.db.models.functions import Now
+
+from .cache import catalog_cache
+from .models import Product
+
+
+class InsufficientStock(Exception):
+    """Raised when one or more products cannot cover the requested quantity."""
+
+    def __init__(self, product_ids):
+        self.product_ids = sorted(product_ids)
+        super().__init__(f"Insufficient stock for products {self.product_ids}")
+
+
+def _quantity_case(quantities, default=None):
+    return Case(
+        *[When(pk=pk, then=Value(qty)) for pk, qty in quantities.items()],
+        default=default,
+        output_field=IntegerField(),
+    )
+
+
+def decrement_stock(quantities, held=None):
+    """
+    Take ``{product_id: quantity}`` out of stock in a single conditional UPDATE:
+
+        UPDATE product SET stock = stock - CASE id WHEN .. END,
+                           reserved = reserved - CASE id WHEN .. ELSE 0 END
+        WHERE id IN (..) AND stock - reserved + held >= CASE id WHEN .. END
+
+    ``held`` is ``{product_id: quantity}`` already reserved by the buyer's
+    cart (store.reservations): those units are converted rather than
+    competed for, while unreserved units must come out of available stock.
+
+    The guard is re-checked by the database against the row it locks, so
+    concurrent checkouts of the same product can never drive stock
+    negative. If any product is short, nothing is decremented by the caller's
+    transaction (InsufficientStock is raised and the caller rolls back).
+    """
+    if not quantities:
+        return
+    qty = _quantity_case(quantities)
+    values = {"stock": F("stock") - qty, "updated_at": Now()}
+    available = F("stock") - F("reserved")
+    if held:
+        held = _quantity_case(held, default=Value(0))
+        values["reserved"] = F("reserved") - held
+        available = available + held
+    updated = Product.objects.alias(available=available).filter(
+        pk__in=quantities.keys(), available__gte=qty
+    ).update(**values)
+    if updated != len(quantities):
+        short = Product.objects.alias(available=available).filter(pk__in=quantities.keys(), available__lt=qty)
+        raise InsufficientStock(short.values_list("pk", flat=True))
+    # stock is part of the cached product payloads
+    catalog_cache.invalidate()
+
+
+# ---------- bulk price/stock sync ----------
+
+BULK_UPDATE_MAX_ROWS = 50000
+# rows per statement; keeps CASE parameters well under SQLite's variable limit
+UPDATE_CHUNK = 500
+
+UPDATED = "updated"
+UNCHANGED = "unchanged"
+NOT_FOUND = "not_found"
+INVALID = "invalid"
+
+_MAX_PRICE = Decimal("100000000")  # max_digits=10, decimal_places=2
+_MAX_STOCK = 2147483647
+_UPDATE_FIELDS = {
+    "price": DecimalField(max_digits=10, decimal_places=2),
+    "stock": IntegerField(),
+}
+
+
+def _chunks(items, size):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _parse_price(value):
+    if isinstance(value, bool):
+        raise ValueError("A valid number is required.")
+    try:
+        price = Decimal(str(value))
+    except InvalidOperation:
+        raise ValueError("A valid number is required.")
+    if not price.is_finite() or price < 0 or price >= _MAX_PRICE:
+        raise ValueError("Ensure this value is between 0 and 99999999.99.")
+    if price != price.quantize(Decimal("0.01")):
+        raise ValueError("Ensure that there are no more than 2 decimal places.")
+    return price.quantize(Decimal("0.01"))
+
+
+def _parse_int(value):
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError("A valid integer is required.")
+    try:
+        stock = int(value)
+    except ValueError:
+        raise ValueError("A valid integer is required.")
+    if not 0 <= stock <= _MAX_STOCK:
+        raise ValueError(f"Ensure this value is between 0 and {_MAX_STOCK}.")
+    return stock
+
+
+def parse_update(row):
+    """
+    Validate one ``{id|slug, price?, stock?}`` row. Returns
+    ``(key, changes)`` where key is ``("id", pk)`` or ``("slug", slug)``, or
+    raises ValueError with a DRF-style ``{field: [message]}`` dict.
+    """
+    if not isinstance(row, dict):
+        raise ValueError({"non_field_errors": ["Expected an object."]})
+    errors, changes = {}, {}
+    if ("id" in row) == ("slug" in row):
+        errors["non_field_errors"] = ["Give exactly one of id or slug."]
+    elif "id" in row:
+        try:
+            key = ("id", _parse_int(row["id"]))
+        except ValueError as exc:
+            errors["id"] = [str(exc)]
+    elif not isinstance(row["slug"], str) or not row["slug"]:
+        errors["slug"] = ["A non-empty string is required."]
+    else:
+        key = ("slug", row["slug"])
+    for field, parse in (("price", _parse_price), ("stock", _parse_int)):
+        if field in row:
+            try:
+                changes[field] = parse(row[field])
+            except ValueError as exc:
+                errors[field] = [str(exc)]
+    if not changes and not errors:
+        errors["non_field_errors"] = ["Give price and/or stock."]
+    if errors:
+        raise ValueError(errors)
+    return key, changes
+
+
+@transaction.atomic
+def apply_product_updates(rows):
+    """
+    Apply a batch of ERP price/stock updates and return one result per row,
+    ``{"index", "status", "id"?, "errors"?}``.
+
+    Rows are validated in one pass, products are resolved by id or slug with
+    a few chunked queries, and only values that actually differ are written,
+    as ``UPDATE ... SET price = CASE id WHEN ... ELSE price END, stock = ...``
+    per chunk. Later rows for the same product win. Unchanged rows keep
+    their ``updated_at``, so a periodic full push doesn't invalidate
+    ETags or the catalog cache.
+    """
+    results, parsed = [], []
+    for index, row in enumerate(rows):
+        try:
+            parsed.append((index, *parse_update(row)))
+        except ValueError as exc:
+            results.append({"index": index, "status": INVALID, "errors": exc.args[0]})
+
+    ids = {value for _, (kind, value), _ in parsed if kind == "id"}
+    slugs = {value for _, (kind, value), _ in parsed if kind == "slug"}
+    current, pk_by_slug = {}, {}
+    for kind, values in (("pk__in", ids), ("slug__in", slugs)):
+        for chunk in _chunks(values, UPDATE_CHUNK):
+            for pk, slug, price, stock in Product.objects.filter(**{kind: chunk}).values_list(
+                "pk", "slug", "price", "stock"
+            ):
+                current[pk] = {"price": price, "stock": stock}
+                pk_by_slug[slug] = pk
+
+    wanted, row_pks = {}, []
+    for index, (kind, value), changes in parsed:
+        pk = value if kind == "id" else pk_by_slug.get(value)
+        if pk not in current:
+            results.append({"index": index, "status": NOT_FOUND})
+            continue
+        wanted.setdefault(pk, {}).update(changes)
+        row_pks.append((index, pk))
+
+    changed = {}
+    for pk, changes in wanted.items():
+        diff = {field: value for field, value in changes.items() if current[pk][field] != value}
+        if diff:
+            changed[pk] = diff
+
+    for chunk in _chunks(changed.items(), UPDATE_CHUNK):
+        values = {"updated_at": Now()}
+        for field, output_field in _UPDATE_FIELDS.items():
+            whens = [When(pk=pk, then=Value(diff[field])) for pk, diff in chunk if field in diff]
+            if whens:
+                values[field] = Case(*whens, default=F(field), output_field=output_field)
+        Product.objects.filter(pk__in=[pk for pk, _ in chunk]).update(**values)
+    if changed:
+        catalog_cache.invalidate()
+
+    results.extend(
+        {"index": index, "id": pk, "status": UPDATED if pk in changed else UNCHANGED}
+        for index, pk in row_pks
+    )
+    results.sort(key=lambda result: result["index"])
+    return results
@@ -0,0 +1,95 @@
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+async def fetch(url, headers):
+    """One HTTP/1.1 GET on a fresh connection; returns the status code."""
+    parts = urlsplit(url)
+    reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+    target = parts.path + (f"?{parts.query}" if parts.query else "")
+    lines = [f"GET {target} HTTP/1.1", f"Host: {parts.netloc}", "Connection: close"]
+    lines += [f"{name}: {value}" for name, value in headers.items()]
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode())
+    await writer.drain()
+    status_line = await reader.readline()
+    await reader.read()
+    writer.close()
+    return int(status_line.split()[1])
+
+
+async def run_load(urls, concurrency, total, headers):
+    latencies, errors = [], 0
+    queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(urls[i % len(urls)])
+
+    async def worker():
+        nonlocal errors
+        while not queue.empty():
+            url = queue.get_nowait()
+            start = time.perf_counter()
+            try:
+                status = await fetch(url, headers)
+            except OSError:
+                status = None
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+
+def percentile(sorted_values, pct):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test running servers and compare them, e.g. the WSGI deployment against the "
+        "ASGI read path:\n"
+        "  gunicorn config.wsgi -w 4 --threads 8 -b 127.0.0.1:8001\n"
+        "  uvicorn config.asgi:application --workers 4 --port 8002\n"
+        "  manage.py bench_load wsgi=http://127.0.0.1:8001/api/store/api "
+        "asgi=http://127.0.0.1:8002/api/store/async --path /products/ --path /categories/"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("targets", nargs="+", help="label=base_url pairs")
+        parser.add_argument("--path", action="append", dest="paths", help="appended to each base url")
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--warmup", type=int, default=100)
+        parser.add_argument("--token", help="JWT access token sent as a Bearer header")
+
+    def handle(self, *args, **options):
+        paths = options["paths"] or ["/products/"]
+        headers = {"Accept": "application/json"}
+        if options["token"]:
+            headers["Authorization"] = f"Bearer {options['token']}"
+
+        self.stdout.write(
+            f"{'target':<12}{'requests':>10}{'errors':>8}{'req/s':>10}"
+            f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}"
+        )
+        for target in options["targets"]:
+            label, sep, base = target.partition("=")
+            if not sep:
+                raise CommandError(f"expected label=base_url, got {target!r}")
+            urls = [base.rstrip("/") + path for path in paths]
+            asyncio.run(run_load(urls, options["concurrency"], options["warmup"], headers))
+            latencies, errors, elapsed = asyncio.run(
+                run_load(urls, options["concurrency"], options["requests"], headers)
+            )
+            latencies.sort()
+            ms = [v * 1000 for v in latencies]
+            self.stdout.write(
+                f"{label:<12}{len(ms):>10}{errors:>8}{len(ms) / elapsed:>10.0f}"
+                f"{statistics.median(ms):>9.1f}{percentile(ms, 95):>9.1f}"
+                f"{percentile(ms, 99):>9.1f}{ms[-1]:>9.1f}"
+            )
@@ -0,0 +1,80 @@
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from config.renderers import FastJSONRenderer, MessagePackRenderer, msgpack, orjson
+from store.models import Category, Product, Order, OrderItem
+from store.serializers import OrderSerializer
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare render time and payload size of the JSON/MessagePack renderers on "
+        "OrderSerializer output. Sample orders are created in a rolled-back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--orders", type=int, default=200)
+        parser.add_argument("--items", type=int, default=10, help="line items per order")
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                data = self.sample_payload(options["orders"], options["items"])
+                self.compare(data, options["repeat"])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def sample_payload(self, n_orders, n_items):
+        user = get_user_model().objects.create(username="bench-renderers")
+        category = Category.objects.create(name="bench-renderers", slug="bench-renderers")
+        products = Product.objects.bulk_create(
+            Product(
+                category=category,
+                name=f"Bench product {i}",
+                slug=f"bench-renderers-{i}",
+                description="Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 4,
+                price=Decimal("9.99") + i,
+                stock=100,
+            )
+            for i in range(n_items)
+        )
+        orders = Order.objects.bulk_create(
+            Order(user=user, shipping_address="221B Baker Street, London", phone="5550100", total_price=0)
+            for _ in range(n_orders)
+        )
+        OrderItem.objects.bulk_create(
+            OrderItem(order=order, product=product, quantity=2, price=product.price)
+            for order in orders
+            for product in products
+        )
+        queryset = OrderSerializer.setup_eager_loading(Order.objects.filter(user=user))
+        return OrderSerializer(queryset, many=True).data
+
+    def compare(self, data, repeat):
+        renderers = [("JSONRenderer (stdlib)", JSONRenderer())]
+        if orjson is not None:
+            renderers.append(("FastJSONRenderer (orjson)", FastJSONRenderer()))
+        if msgpack is not None:
+            renderers.append(("MessagePackRenderer", MessagePackRenderer()))
+
+        self.stdout.write(f"{len(data)} orders, best of {repeat}")
+        for label, renderer in renderers:
+            best, size = None, 0
+            for _ in range(repeat):
+                start = time.perf_counter()
+                body = renderer.render(data, renderer.media_type, {})
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+                size = len(body)
+            self.stdout.write(f"  {label:<26} {best * 1000:8.2f} ms  {size / 1024:9.1f} KiB")
@@ -0,0 +1,70 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory
+
+from store.fast_serializers import product_values, serialize_products
+from store.models import Category, Product
+from store.serializers import ProductSerializer
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Microbenchmark product serialization: ProductSerializer vs the .values() fast path. "
+        "Sample rows are created in a transaction that is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options["rows"], options["repeat"])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def run(self, rows, repeat):
+        category = Category.objects.create(name="bench-category", slug="bench-category")
+        Product.objects.bulk_create(
+            Product(
+                category=category,
+                name=f"Bench product {i}",
+                slug=f"bench-product-{i}",
+                description="Lorem ipsum dolor sit amet " * 8,
+                price=Decimal("19.99") + i,
+                stock=i,
+            )
+            for i in range(rows)
+        )
+        queryset = Product.objects.filter(category=category).select_related("category").order_by("-created_at", "-id")
+        request = APIRequestFactory().get("/api/store/api/products/")
+
+        # rows are fetched once up front so only serialization is timed
+        instances = list(queryset)
+        values = list(product_values(queryset))
+
+        def drf():
+            return ProductSerializer(instances, many=True, context={"request": request}).data
+
+        def fast():
+            return serialize_products(values, request)
+
+        self.stdout.write(f"{rows} rows, best of {repeat}")
+        for label, fn in (("ProductSerializer", drf), ("fast path", fast)):
+            best = min(self.timed(fn) for _ in range(repeat))
+            self.stdout.write(f"  {label:<18} {best * 1000:9.2f} ms total  {best / rows * 1e6:8.2f} us/row")
+
+    @staticmethod
+    def timed(fn):
+        start = time.perf_counter()
+        fn()
+        return time.perf_counter() - start
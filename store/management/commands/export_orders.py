@@ -0,0 +1,42 @@
+import functools
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from store import exports
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream orders to a file or stdout as CSV (one row per line item) or JSONL (one "
+        "order per line). Memory use is bounded by --chunk-size, not by the number of orders."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=exports.FORMATS, default="csv", dest="fmt")
+        parser.add_argument("--since", help="ISO date/datetime, inclusive")
+        parser.add_argument("--until", help="ISO datetime, exclusive; a bare date includes that day")
+        parser.add_argument("--output", "-o", help="file to write (default: stdout)")
+        parser.add_argument("--chunk-size", type=int, default=exports.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            since = exports.parse_bound(options["since"]) if options["since"] else None
+            until = exports.parse_bound(options["until"], end=True) if options["until"] else None
+        except ValueError as exc:
+            raise CommandError(exc)
+
+        lines = exports.export_lines(options["fmt"], since, until, options["chunk_size"])
+        start = time.perf_counter()
+        count = 0
+        out = open(options["output"], "w", encoding="utf-8", newline="") if options["output"] else None
+        write = out.write if out else functools.partial(self.stdout.write, ending="")
+        try:
+            for line in lines:
+                write(line)
+                count += 1
+        finally:
+            if out:
+                out.close()
+        elapsed = time.perf_counter() - start
+        self.stderr.write(f"{count} lines in {elapsed:.2f} s")
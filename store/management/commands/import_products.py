@@ -0,0 +1,51 @@
+import os
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from store.importing import BATCH_SIZE, ProductImporter, read_records
+
+
+class Command(BaseCommand):
+    help = (
+        "Upsert products from a CSV (with header) or JSONL file, keyed on slug. Columns: "
+        "name, category, price (required), slug, description, stock, is_active. Unknown "
+        "categories are created. Use '-' to read stdin."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=["csv", "jsonl"], dest="fmt",
+                            help="default: from the file extension")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, path, fmt, batch_size, **options):
+        fmt = fmt or {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}.get(os.path.splitext(path)[1])
+        if fmt is None:
+            raise CommandError("cannot tell the format from the file name; pass --format")
+
+        importer = ProductImporter(batch_size)
+        start = time.perf_counter()
+
+        def progress(imported):
+            elapsed = time.perf_counter() - start
+            self.stderr.write(f"\r{imported} products, {imported / elapsed:.0f}/s", ending="")
+
+        stream = sys.stdin if path == "-" else open(path, encoding="utf-8", newline="")
+        try:
+            importer.run(read_records(stream, fmt), progress)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        elapsed = time.perf_counter() - start
+        self.stderr.write("")
+        for number, message in importer.errors[:20]:
+            self.stderr.write(f"record {number}: {message}")
+        if len(importer.errors) > 20:
+            self.stderr.write(f"... and {len(importer.errors) - 20} more")
+        self.stdout.write(
+            f"{importer.imported} products upserted, {len(importer.errors)} skipped "
+            f"in {elapsed:.1f} s ({importer.imported / elapsed if elapsed else 0:.0f} rows/s)"
+        )
@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from store import analytics
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the daily sales rollups from the full order history. Run once after "
+        "upgrading an existing database, with checkout and job workers stopped."
+    )
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        analytics.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt sales rollups in {time.monotonic() - start:.2f}s"))
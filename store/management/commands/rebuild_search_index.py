@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from store import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the product full-text search index from the product table"
+
+    def handle(self, *args, **options):
+        if not search.is_enabled():
+            self.stdout.write(self.style.WARNING("Full-text index is only used on SQLite; nothing to do."))
+            return
+        start = time.monotonic()
+        count = search.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {count} products in {time.monotonic() - start:.2f}s"
+        ))
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from store import reservations
+
+
+class Command(BaseCommand):
+    help = (
+        "Release expired cart stock reservations in batches. Runs once by default; "
+        "with --interval it keeps sweeping every that many seconds."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, help="default: STORE_RESERVATIONS['SWEEP_BATCH_SIZE']")
+        parser.add_argument("--interval", type=float, help="seconds between sweeps; run forever")
+
+    def handle(self, *args, batch_size, interval, **options):
+        while True:
+            released = reservations.release_expired(batch_size)
+            if released or interval is None:
+                self.stdout.write(f"{released} expired reservations released")
+            if interval is None:
+                return
+            time.sleep(interval)
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:20
+
+from django.db import migrations, models
+from django.db.models import DecimalField, F, Sum
+
+
+def backfill_summaries(apps, schema_editor):
+    Cart = apps.get_model('store', 'Cart')
+    CartItem = apps.get_model('store', 'CartItem')
+    totals = CartItem.objects.values('cart_id').annotate(
+        n=Sum('quantity'),
+        t=Sum(F('price') * F('quantity'), output_field=DecimalField(max_digits=12, decimal_places=2)),
+    )
+    carts = []
+    for row in totals:
+        carts.append(Cart(pk=row['cart_id'], item_count=row['n'], total_price=row['t']))
+    Cart.objects.bulk_update(carts, ['item_count', 'total_price'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0005_category_cart_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cart',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='cart',
+            name='total_price',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
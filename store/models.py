@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Now
 from django.conf import settings
 from django.utils.text import slugify
 
@@ -8,6 +10,7 @@ class Category(models.Model):
     name = models.CharField(max_length=120, unique=True)
     slug = models.SlugField(max_length=140, unique=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -25,11 +28,19 @@ class Product(models.Model):
     description = models.TextField(blank=True)
     price = models.DecimalField(max_digits=10, decimal_places=2)
     stock = models.PositiveIntegerField(default=0)
+    # units held by cart reservations (store.reservations); available = stock - reserved
+    reserved = models.PositiveIntegerField(default=0)
     image = models.ImageField(upload_to='products/', null=True, blank=True)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # keyset pagination: WHERE is_active ORDER BY created_at DESC, id DESC
+            models.Index(fields=["is_active", "-created_at", "-id"], name="product_active_created_idx"),
+        ]
+
     def save(self, *args, **kwargs):
         if not self.slug:
             # simple slug creation; ensure uniqueness in production you may want to append id
@@ -45,14 +56,39 @@ class Cart(models.Model):
     # for guest carts you can store a session_key
     session_key = models.CharField(max_length=255, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)  # touched by every cart mutation; drives the cart ETag
+    # denormalized summary, refreshed by refresh_summary() after every item change
+    item_count = models.PositiveIntegerField(default=0)  # total quantity across items
+    total_price = models.DecimalField(max_digits=12, decimal_places=2, default=0)
 
     def __str__(self):
         return f"Cart ({self.pk}) - user:{self.user if self.user else 'guest'}"
 
     @property
     def total(self):
-        items = self.items.all()
-        return sum(item.subtotal for item in items)
+        return self.total_price
+
+    def refresh_summary(self):
+        """Recompute item_count/total_price and load them back onto this instance."""
+        Cart.update_summary(self.pk)
+        self.refresh_from_db(fields=["item_count", "total_price", "updated_at"])
+
+    @staticmethod
+    def update_summary(cart_id):
+        """
+        Recompute a cart's item_count/total_price from its items in a single
+        UPDATE, so concurrent mutations can't store a stale sum.
+        """
+        lines = CartItem.objects.filter(cart=OuterRef("pk")).order_by().values("cart")
+        count = lines.annotate(n=Sum("quantity")).values("n")
+        total = lines.annotate(
+            t=Sum(F("price") * F("quantity"), output_field=DecimalField(max_digits=12, decimal_places=2))
+        ).values("t")
+        Cart.objects.filter(pk=cart_id).update(
+            item_count=Coalesce(Subquery(count), Value(0)),
+            total_price=Coalesce(Subquery(total), Value(0), output_field=DecimalField(max_digits=12, decimal_places=2)),
+            updated_at=Now(),
+        )
 
 
 class CartItem(models.Model):
@@ -73,6 +109,23 @@ class CartItem(models.Model):
         return f"{self.product.name} x {self.quantity}"
 
 
+class StockReservation(models.Model):
+    """A cart's time-limited hold on stock, mirrored in ``Product.reserved``."""
+
+    cart = models.ForeignKey(Cart, related_name='reservations', on_delete=models.CASCADE)
+    product = models.ForeignKey(Product, related_name='reservations', on_delete=models.CASCADE)
+    quantity = models.PositiveIntegerField()
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('cart', 'product')
+        indexes = [
+            # the sweeper scans WHERE expires_at <= now ORDER BY expires_at
+            models.Index(fields=["expires_at"], name="reservation_expires_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} x {self.quantity} for cart {self.cart_id}"
 
 
 class Order(models.Model):
@@ -90,6 +143,15 @@ class Order(models.Model):
     phone = models.CharField(max_length=20, blank=True, null=True)
     total_price = models.DecimalField(max_digits=10, decimal_places=2, default=0.0)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="PENDING")  # 👈 NEW FIELD
+    # the status the sales rollups currently count this order under (store.analytics)
+    counted_status = models.CharField(max_length=20, choices=STATUS_CHOICES, null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="order_created_idx"),
+            # change feed: WHERE (updated_at, id) > cursor ORDER BY updated_at, id
+            models.Index(fields=["updated_at", "id"], name="order_updated_idx"),
+        ]
 
     def calculate_total(self):
         self.total_price = sum(item.price * item.quantity for item in self.items.all())
@@ -114,3 +176,68 @@ class OrderItem(models.Model):
 
     def __str__(self):
         return f"{self.product.name} x {self.quantity}"
+
+
+class OrderEvent(models.Model):
+    """Append-only log of order status transitions (store.changes)."""
+
+    order = models.ForeignKey(Order, related_name='events', on_delete=models.CASCADE)
+    from_status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    to_status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    actor = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # one order's history: WHERE order_id = .. ORDER BY id
+            models.Index(fields=["order", "id"], name="order_event_order_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise ValueError("Order events are append-only")
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"Order #{self.order_id}: {self.from_status} -> {self.to_status}"
+
+
+# ---------- sales rollups (store.analytics) ----------
+# Counters are signed: they are moved by deltas as orders change status.
+
+class DailySales(models.Model):
+    """Orders and revenue per day (of order placement) and current status."""
+
+    day = models.DateField()
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    orders = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ('day', 'status')
+
+
+class DailyProductSales(models.Model):
+    """Non-cancelled sales per day and product."""
+
+    day = models.DateField()
+    product = models.ForeignKey(Product, related_name='+', on_delete=models.CASCADE)
+    orders = models.IntegerField(default=0)
+    units = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ('day', 'product')
+
+
+class DailyCategorySales(models.Model):
+    """Non-cancelled sales per day and category."""
+
+    day = models.DateField()
+    category = models.ForeignKey(Category, related_name='+', on_delete=models.CASCADE)
+    orders = models.IntegerField(default=0)
+    units = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ('day', 'category')
@@ -0,0 +1,21 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor (keyset) pagination over ``created_at``/``id``.
+
+    Pages are fetched with ``WHERE created_at < <cursor>`` instead of an
+    OFFSET, and no ``COUNT(*)`` is issued, so every page costs the same
+    regardless of how deep the client has scrolled or how large the table is.
+    The cursor returned in ``next``/``previous`` is opaque to clients.
+    """
+    ordering = ("-created_at", "-id")
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def get_page_size(self, request):
+        # read per request, not at import, so settings overrides apply
+        default = getattr(settings, "STORE_PAGE_SIZE", 20)
+        return super().get_page_size(request) or default
@@ -0,0 +1,171 @@
+"""
+Time-limited stock reservations taken when products are added to a cart.
+
+A reservation is a ``StockReservation`` row (cart, product, quantity,
+expires_at) plus the same quantity counted in ``Product.reserved``, so the
+stock a buyer can still take is ``stock - reserved``. The counter is only
+ever moved by single conditional UPDATEs:
+
+    reserve:  UPDATE product SET reserved = reserved + q
+              WHERE id = .. AND stock - reserved >= q
+    release:  UPDATE product SET reserved = reserved - CASE id WHEN .. END
+              WHERE id IN (..)
+
+so concurrent carts competing for a hot product serialize on that one row
+for a single statement rather than on a checkout-length transaction, and
+the losers are refused at add-to-cart instead of at checkout.
+
+Cart endpoints call ``sync`` after changing lines, checkout turns the
+cart's holds into stock decrements (``convert``), and ``release_expired``
+(the ``sweep_reservations`` command) gives back holds whose TTL has passed,
+in batches.
+"""
+import datetime
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from config.options import merged
+from .inventory import InsufficientStock, _quantity_case, decrement_stock
+from .models import CartItem, Product, StockReservation
+
+DEFAULTS = {
+    "TTL": 15 * 60,
+    "SWEEP_BATCH_SIZE": 500,
+}
+
+
+def options():
+    return merged("STORE_RESERVATIONS", DEFAULTS)
+
+
+def held_quantities(cart_id):
+    """
+    ``{product_id: quantity}`` currently held by the cart, expired or not:
+    an expired hold still counts in ``Product.reserved`` until it is swept.
+    The rows are locked so the sweeper can't release them underneath us.
+    """
+    reservations = StockReservation.objects.select_for_update().filter(cart_id=cart_id)
+    return dict(reservations.values_list("product_id", "quantity"))
+
+
+def _release_counts(quantities):
+    if quantities:
+        Product.objects.filter(pk__in=quantities.keys()).update(reserved=F("reserved") - _quantity_case(quantities))
+
+
+@transaction.atomic
+def hold(cart_id, quantities):
+    """
+    Make the cart hold exactly ``{product_id: quantity}`` for the listed
+    products (0 releases the hold) and restart their TTL.
+
+    Increases are taken with one conditional UPDATE for all products; if
+    any of them lacks available stock nothing is reserved and
+    InsufficientStock is raised, so the caller should roll back.
+    """
+    if not quantities:
+        return
+    current = held_quantities(cart_id)
+    more = {pk: qty - current.get(pk, 0) for pk, qty in quantities.items() if qty > current.get(pk, 0)}
+    less = {pk: current[pk] - qty for pk, qty in quantities.items() if qty < current.get(pk, 0)}
+
+    if more:
+        delta = _quantity_case(more)
+        taken = Product.objects.filter(pk__in=more.keys(), stock__gte=F("reserved") + delta).update(
+            reserved=F("reserved") + delta
+        )
+        if taken != len(more):
+            short = Product.objects.filter(pk__in=more.keys(), stock__lt=F("reserved") + delta)
+            raise InsufficientStock(short.values_list("pk", flat=True))
+    _release_counts(less)
+
+    expires_at = timezone.now() + datetime.timedelta(seconds=options()["TTL"])
+    gone = [pk for pk, qty in quantities.items() if qty == 0]
+    if gone:
+        StockReservation.objects.filter(cart_id=cart_id, product_id__in=gone).delete()
+    StockReservation.objects.bulk_create(
+        [
+            StockReservation(cart_id=cart_id, product_id=pk, quantity=qty, expires_at=expires_at)
+            for pk, qty in quantities.items()
+            if qty
+        ],
+        update_conflicts=True,
+        unique_fields=["cart", "product"],
+        update_fields=["quantity", "expires_at"],
+    )
+
+
+def sync(cart_id, product_ids):
+    """
+    Make the cart's holds on ``product_ids`` match its lines: a line's
+    whole quantity is held (re-taking a hold that had expired), and
+    products no longer in the cart are released.
+    """
+    quantities = dict.fromkeys(product_ids, 0)
+    quantities.update(
+        CartItem.objects.filter(cart_id=cart_id, product_id__in=quantities.keys()).values_list("product_id", "quantity")
+    )
+    hold(cart_id, quantities)
+
+
+@transaction.atomic
+def release(cart_id, product_ids=None):
+    """Give back the cart's holds on ``product_ids`` (all of them by default)."""
+    reservations = StockReservation.objects.select_for_update().filter(cart_id=cart_id)
+    if product_ids is not None:
+        reservations = reservations.filter(product_id__in=product_ids)
+    held = dict(reservations.values_list("product_id", "quantity"))
+    _release_counts(held)
+    StockReservation.objects.filter(cart_id=cart_id, product_id__in=held.keys()).delete()
+
+
+def release_expired(batch_size=None, now=None):
+    """
+    Release every reservation that expired before ``now``, ``batch_size``
+    at a time, each batch in its own short transaction. Returns the number
+    of reservations released.
+    """
+    batch_size = batch_size or options()["SWEEP_BATCH_SIZE"]
+    now = now or timezone.now()
+    released = 0
+    while True:
+        count = _release_batch(batch_size, now)
+        released += count
+        if count < batch_size:
+            return released
+
+
+@transaction.atomic
+def _release_batch(batch_size, now):
+    # skip rows a checkout or cart update has locked; they're handled there
+    rows = list(
+        StockReservation.objects.select_for_update(skip_locked=True)
+        .filter(expires_at__lte=now)
+        .order_by("expires_at")
+        .values_list("pk", "product_id", "quantity")[:batch_size]
+    )
+    totals = {}
+    for _, product_id, quantity in rows:
+        totals[product_id] = totals.get(product_id, 0) + quantity
+    _release_counts(totals)
+    StockReservation.objects.filter(pk__in=[pk for pk, _, _ in rows]).delete()
+    return len(rows)
+
+
+def convert(cart_id, quantities):
+    """
+    Checkout: take ``{product_id: quantity}`` out of stock, consuming the
+    cart's holds on those products, and release holds left on products the
+    cart no longer has a line for. Raises InsufficientStock.
+    """
+    held = held_quantities(cart_id)
+    decrement_stock(quantities, held)
+    StockReservation.objects.filter(cart_id=cart_id, product_id__in=quantities.keys()).delete()
+    orphaned = set(held) - set(quantities)
+    if orphaned:
+        # a line added after checkout read the cart keeps its hold for the next checkout
+        lines = CartItem.objects.filter(cart_id=cart_id, product_id__in=orphaned)
+        orphaned -= set(lines.values_list("product_id", flat=True))
+        release(cart_id, orphaned)
@@ -0,0 +1,145 @@
+"""
+Full-text product search.
+
+On SQLite the catalog is indexed in an FTS5 virtual table keyed by product id
+(``rowid``) with one column each for name, description and category name.
+The index is kept in sync incrementally by the signal handlers in
+``store.signals`` and can be rebuilt from scratch with
+``manage.py rebuild_search_index``. Other database backends fall back to a
+case-insensitive ``LIKE`` filter.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = "store_product_fts"
+
+# bm25 column weights: a hit in the name outranks the category, which outranks the description
+RANK_WEIGHTS = (10.0, 1.0, 4.0)
+
+CREATE_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "name, description, category, "
+    "tokenize = 'porter unicode61 remove_diacritics 2', prefix = '2 3')"
+)
+DROP_SQL = f"DROP TABLE IF EXISTS {FTS_TABLE}"
+
+_SELECT_DOCUMENTS = """
+    SELECT p.id, p.name, p.description, c.name
+    FROM store_product p JOIN store_category c ON c.id = p.category_id
+"""
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def is_enabled():
+    return connection.vendor == "sqlite"
+
+
+def build_match_query(q):
+    """
+    Turn free text into a safe FTS5 MATCH expression: every word is quoted
+    (so user input can never be parsed as FTS syntax), words are ANDed and the
+    last one is a prefix match so results update while the user types.
+    """
+    tokens = _TOKEN_RE.findall(q or "")
+    if not tokens:
+        return ""
+    terms = [f'"{t}"' for t in tokens]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def search(queryset, q, limit):
+    """
+    Apply a relevance-ranked search to ``queryset`` and return a list of at
+    most ``limit`` products (or ``.values()`` rows) ordered by rank.
+
+    The index is joined into the queryset's own query, so its filters (e.g.
+    ``is_active``) apply before the LIMIT and excluded products can't use
+    up the page.
+    """
+    if not is_enabled():
+        return list(filter_queryset(queryset, q)[:limit])
+    match = build_match_query(q)
+    if not match:
+        return []
+    ranked = queryset.extra(
+        tables=[FTS_TABLE],
+        where=[f"{FTS_TABLE}.rowid = store_product.id", f"{FTS_TABLE} MATCH %s"],
+        params=[match],
+    ).order_by(RawSQL(f"bm25({FTS_TABLE}, %s, %s, %s)", RANK_WEIGHTS), "id")
+    return list(ranked[:limit])
+
+
+def filter_queryset(queryset, q):
+    """Unranked search, for callers that apply their own ordering (e.g. the admin)."""
+    if not is_enabled():
+        return queryset.filter(
+            Q(name__icontains=q) | Q(description__icontains=q) | Q(category__name__icontains=q)
+        )
+    match = build_match_query(q)
+    if not match:
+        return queryset.none()
+    return queryset.extra(
+        where=[f"store_product.id IN (SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s)"],
+        params=[match],
+    )
+
+
+# ---------- index maintenance ----------
+
+def index_products(product_ids):
+    """(Re)index the given products in one statement."""
+    if not is_enabled() or not product_ids:
+        return
+    ids = list(product_ids)
+    placeholders = ", ".join(["%s"] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", ids)
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, name, description, category) "
+            f"{_SELECT_DOCUMENTS} WHERE p.id IN ({placeholders})",
+            ids,
+        )
+
+
+def index_category(category_id):
+    """Reindex every product of a category, e.g. after it was renamed."""
+    if not is_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {FTS_TABLE} WHERE rowid IN "
+            f"(SELECT id FROM store_product WHERE category_id = %s)",
+            [category_id],
+        )
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, name, description, category) "
+            f"{_SELECT_DOCUMENTS} WHERE p.category_id = %s",
+            [category_id],
+        )
+
+
+def unindex_products(product_ids):
+    if not is_enabled() or not product_ids:
+        return
+    ids = list(product_ids)
+    placeholders = ", ".join(["%s"] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", ids)
+
+
+def rebuild():
+    """Drop and repopulate the whole index with one INSERT ... SELECT, then merge segments."""
+    if not is_enabled():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(DROP_SQL)
+        cursor.execute(CREATE_SQL)
+        cursor.execute(f"INSERT INTO {FTS_TABLE} (rowid, name, description, category) {_SELECT_DOCUMENTS}")
+        cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+        cursor.execute(f"SELECT count(*) FROM {FTS_TABLE}")
+        return cursor.fetchone()[0]
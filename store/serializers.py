@@ -1,14 +1,18 @@
+from django.db.models import Prefetch
 from rest_framework import serializers
-from .models import Category, Product, Cart, CartItem, Order, OrderItem
+from .models import Category, Product, Cart, CartItem, Order, OrderItem, OrderEvent
+from .sparse import SparseFieldsMixin, request_options, wants, is_expanded
 
+PRODUCT_REF_FIELDS = ["id", "name", "slug", "price"]
 
-class CategorySerializer(serializers.ModelSerializer):
+
+class CategorySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = ["id", "name", "slug"]
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     category = CategorySerializer(read_only=True)
     category_id = serializers.PrimaryKeyRelatedField(
         queryset=Category.objects.all(), source="category", write_only=True
@@ -31,9 +35,39 @@ class ProductSerializer(serializers.ModelSerializer):
             "updated_at",
         ]
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related("category")
+
+
+class ProductRefSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Compact product reference embedded in cart and order lines; ?expand=product for the full object."""
+
+    class Meta:
+        model = Product
+        fields = PRODUCT_REF_FIELDS
+
+
+def _line_items_queryset(model, parent_field, context, path):
+    """
+    Queryset for prefetching cart/order lines, narrowed to what the response
+    renders: the full product and category when expanded, otherwise only
+    the columns of the compact product reference.
+    """
+    expand = request_options(context)[1] if context is not None else frozenset()
+    queryset = model.objects.order_by("id")
+    if is_expanded(expand, f"{path}.product"):
+        return queryset.select_related("product__category")
+    return queryset.select_related("product").only(
+        "id", parent_field, "quantity", "price",
+        *(f"product__{name}" for name in PRODUCT_REF_FIELDS),
+    )
+
 
-class CartItemSerializer(serializers.ModelSerializer):
-    product = ProductSerializer(read_only=True)
+class CartItemSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    expandable = {"product": lambda: ProductSerializer(read_only=True)}
+
+    product = ProductRefSerializer(read_only=True)
     product_id = serializers.PrimaryKeyRelatedField(
         queryset=Product.objects.all(), source="product", write_only=True
     )
@@ -42,26 +76,67 @@ class CartItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = CartItem
         fields = ["id", "product", "product_id", "quantity", "price", "subtotal"]
+        read_only_fields = ["price"]  # snapshot of product.price, set by the view
+
+
+class CartItemWriteSerializer(serializers.Serializer):
+    """
+    Input for cart adds. Product existence is checked by the upsert itself
+    (see store.carts), so validation here needs no query.
+    """
+    product_id = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=1, default=1)
+
 
+class CartBulkOperationSerializer(serializers.Serializer):
+    product_id = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=0, default=1)
+    action = serializers.ChoiceField(choices=["add", "set", "remove"], default="add")
 
-class CartSerializer(serializers.ModelSerializer):
+
+class CartBulkSerializer(serializers.Serializer):
+    operations = CartBulkOperationSerializer(many=True, allow_empty=False, max_length=200)
+
+
+class CartSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     items = CartItemSerializer(many=True, read_only=True)
     total = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
 
     class Meta:
         model = Cart
-        fields = ["id", "user", "session_key", "items", "total", "created_at"]
+        fields = ["id", "user", "session_key", "items", "item_count", "total", "created_at"]
+
+    @staticmethod
+    def items_prefetch(context=None):
+        return Prefetch("items", queryset=_line_items_queryset(CartItem, "cart_id", context, "items"))
 
+    @classmethod
+    def setup_eager_loading(cls, queryset, context=None):
+        fields = request_options(context)[0] if context is not None else None
+        if not wants(fields, "items"):
+            return queryset
+        return queryset.prefetch_related(cls.items_prefetch(context))
 
-class OrderItemSerializer(serializers.ModelSerializer):
-    product = ProductSerializer(read_only=True)
+
+class CartSummarySerializer(serializers.ModelSerializer):
+    total = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = Cart
+        fields = ["id", "item_count", "total"]
+
+
+class OrderItemSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    expandable = {"product": lambda: ProductSerializer(read_only=True)}
+
+    product = ProductRefSerializer(read_only=True)
 
     class Meta:
         model = OrderItem
         fields = ["id", "product", "quantity", "price", "subtotal"]
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     items = OrderItemSerializer(many=True, read_only=True)
 
     class Meta:
@@ -78,3 +153,27 @@ class OrderSerializer(serializers.ModelSerializer):
             "updated_at",
         ]
         read_only_fields = ["user", "total_price", "status","created_at"]
+
+    @staticmethod
+    def items_prefetch(context=None):
+        return Prefetch("items", queryset=_line_items_queryset(OrderItem, "order_id", context, "items"))
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, context=None):
+        fields = request_options(context)[0] if context is not None else None
+        if not wants(fields, "items"):
+            return queryset
+        return queryset.prefetch_related(cls.items_prefetch(context))
+
+
+class AdminOrderSerializer(OrderSerializer):
+    """Admins may move an order between statuses; each move is logged as an OrderEvent."""
+
+    class Meta(OrderSerializer.Meta):
+        read_only_fields = ["user", "total_price", "created_at"]
+
+
+class OrderEventSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = OrderEvent
+        fields = ["id", "order", "from_status", "to_status", "actor", "created_at"]
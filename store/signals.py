@@ -0,0 +1,48 @@
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+
+from . import reservations, search
+from .cache import catalog_cache
+from .carts import forget_cart_id
+from .models import Category, Product, Cart
+
+
+# ---------- SEARCH INDEX ----------
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, **kwargs):
+    search.index_products([instance.pk])
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, **kwargs):
+    search.unindex_products([instance.pk])
+
+
+@receiver(post_save, sender=Category)
+def reindex_category(sender, instance, created, **kwargs):
+    if not created:
+        search.index_category(instance.pk)
+
+
+# ---------- CATALOG CACHE ----------
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_catalog_cache(sender, **kwargs):
+    catalog_cache.invalidate()
+
+
+# ---------- CART ID CACHE ----------
+@receiver(post_delete, sender=Cart)
+def forget_deleted_cart(sender, instance, **kwargs):
+    if instance.user_id:
+        forget_cart_id(instance.user_id)
+
+
+
+# ---------- STOCK RESERVATIONS ----------
+@receiver(pre_delete, sender=Cart)
+def release_cart_reservations(sender, instance, **kwargs):
+    # the reservation rows cascade with the cart, but their units must go back to Product.reserved
+    reservations.release(instance.pk)
@@ -0,0 +1,97 @@
+"""
+Sparse fieldsets and opt-in expansion for store payloads.
+
+``?fields=id,total,items.quantity``
+    keep only the listed fields. Dotted paths reach into nested objects; a
+    nested object with no dotted path under it keeps all of its fields.
+``?expand=product``
+    replace a compact reference (see ``ProductRefSerializer``) with the full
+    nested object. ``items.product`` works as well.
+"""
+
+
+def parse_paths(request, param):
+    if request is None:
+        return None
+    raw = getattr(request, "query_params", request.GET).get(param)
+    if not raw:
+        return None
+    return frozenset(p.strip() for p in raw.split(",") if p.strip())
+
+
+def request_options(context):
+    """Parse ``fields``/``expand`` once per root serializer and memoize them in its context."""
+    if "_sparse" not in context:
+        request = context.get("request")
+        context["_sparse"] = (parse_paths(request, "fields"), parse_paths(request, "expand") or frozenset())
+    return context["_sparse"]
+
+
+def selected(fields, path):
+    """
+    Names to keep at the level found at dotted ``path`` (``""`` for the
+    root), or None to keep everything.
+    """
+    if fields is None:
+        return None
+    prefix = f"{path}." if path else ""
+    names = {f[len(prefix):].split(".")[0] for f in fields if f.startswith(prefix)}
+    return names or None
+
+
+def wants(fields, path):
+    """Whether the field at dotted ``path`` is part of the response."""
+    parent, _, name = path.rpartition(".")
+    names = selected(fields, parent)
+    return names is None or name in names
+
+
+def is_expanded(expand, path):
+    return path in expand or path.rpartition(".")[2] in expand
+
+
+def sparse_dict(data, fields, path=""):
+    """Apply ``?fields=`` to an already-built dict, e.g. from the product fast path."""
+    names = selected(fields, path)
+    if names is None:
+        return data
+    out = {}
+    for name, value in data.items():
+        if name not in names:
+            continue
+        child = f"{path}.{name}" if path else name
+        out[name] = sparse_dict(value, fields, child) if isinstance(value, dict) else value
+    return out
+
+
+class SparseFieldsMixin:
+    """
+    Serializer mixin implementing ``?fields=`` and ``?expand=``.
+
+    ``expandable`` maps a field name to a zero-argument callable returning
+    the full nested serializer used when that field is expanded.
+    """
+    expandable = {}
+
+    def field_path(self):
+        names = []
+        node = self
+        while node is not None:
+            if getattr(node, "field_name", ""):
+                names.append(node.field_name)
+            node = getattr(node, "parent", None)
+        return ".".join(reversed(names))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        requested, expand = request_options(self.context)
+        path = self.field_path()
+        for name, factory in self.expandable.items():
+            if name in fields and is_expanded(expand, f"{path}.{name}" if path else name):
+                fields[name] = factory()
+        names = selected(requested, path)
+        if names is not None:
+            for name in list(fields):
+                if name not in names and not fields[name].write_only:
+                    fields.pop(name)
+        return fields
@@ -0,0 +1,32 @@
+"""Background jobs for the store, run by ``manage.py run_workers`` (core.jobs)."""
+from django.core.mail import send_mail
+
+from core.jobs import task
+from . import analytics
+from .models import Order
+
+ORDER_CONFIRMATION = "store.order_confirmation"
+SALES_ROLLUP = "store.sales_rollup"
+
+
+@task(ORDER_CONFIRMATION)
+def send_order_confirmation(order_id):
+    order = Order.objects.select_related("user").filter(pk=order_id).first()
+    if order is None or not order.user.email:
+        return
+    lines = [
+        f"{name} x {quantity} @ {price}"
+        for name, quantity, price in order.items.values_list("product__name", "quantity", "price")
+    ]
+    send_mail(
+        f"Order #{order.pk} confirmed",
+        "\n".join([f"Thanks for your order, {order.user.name or order.user.username}.", "", *lines, "",
+                   f"Total: {order.total_price}"]),
+        None,
+        [order.user.email],
+    )
+
+
+@task(SALES_ROLLUP)
+def update_sales_rollups(order_id):
+    analytics.apply_order(order_id)
@@ -1,3 +1,1111 @@
-from django.test import TestCase
+import csv
+import datetime
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from decimal import Decimal
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import AsyncClient, Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from config import openapi
+from config.metrics import merge, registry
+from config.renderers import FastJSONRenderer, msgpack
+from core import jobs
+from core.models import Job
+
+from . import analytics, exports, reservations
+from .cache import CatalogCache, catalog_cache
+from .fast_serializers import product_values, serialize_products
+from .models import (
+    Category, Product, Cart, CartItem, Order, OrderEvent, OrderItem, StockReservation,
+    DailySales, DailyProductSales,
+)
+from .serializers import ProductSerializer, OrderSerializer
+from .tasks import ORDER_CONFIRMATION, SALES_ROLLUP
+
+User = get_user_model()
+
+
+class StoreAPITestCase(TestCase):
+    """Shared fixtures: one category, a customer with a cart and an admin."""
+
+    def setUp(self):
+        cache.clear()
+        catalog_cache.clear()
+        self.category = Category.objects.create(name="Books")
+        self.user = User.objects.create_user(username="buyer", password="pass12345")
+        self.admin = User.objects.create_superuser(username="admin", password="pass12345")
+        self.cart = Cart.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self._seq = 0
+
+    def make_product(self, **kwargs):
+        self._seq += 1
+        defaults = {
+            "category": self.category,
+            "name": f"Product {self._seq}",
+            "price": Decimal("10.00"),
+            "stock": 100,
+        }
+        defaults.update(kwargs)
+        return Product.objects.create(**defaults)
+
+    def fill_cart(self, n):
+        for _ in range(n):
+            product = self.make_product(category=Category.objects.create(name=f"Cat {self._seq}"))
+            CartItem.objects.create(cart=self.cart, product=product, quantity=2, price=product.price)
+        self.cart.refresh_summary()
+
+    def make_order(self, n_items):
+        order = Order.objects.create(user=self.user, shipping_address="x", phone="1")
+        for _ in range(n_items):
+            product = self.make_product()
+            OrderItem.objects.create(order=order, product=product, quantity=1, price=product.price)
+        return order
+
+
+class QueryBudgetTests(StoreAPITestCase):
+    """
+    Each read endpoint declares a query budget that must hold at every data
+    size; a serializer that falls back to lazy loading blows the budget as
+    soon as a second row is added.
+    """
+
+    BUDGETS = {
+        "cart-list": 3,          # ETag validator + cart lookup + items/product/category prefetch
+        "order-list": 2,         # orders + items/product/category prefetch
+        "admin-order-list": 2,
+        "product-list": 3,       # 2 ETag aggregates + products joined with category
+    }
+
+    def assert_budget(self, name, url, grow, sizes=(1, 5, 20)):
+        self.client.get(url)  # budgets are for the steady state: warm per-user lookups (e.g. the cart id)
+        counts = []
+        for n in sizes:
+            grow(n)
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            counts.append(len(ctx.captured_queries))
+        self.assertTrue(
+            all(c <= self.BUDGETS[name] for c in counts),
+            f"{name} exceeded its budget of {self.BUDGETS[name]} queries: {counts}",
+        )
+
+    def test_cart_list(self):
+        self.assert_budget("cart-list", "/api/store/api/cart/", self.fill_cart)
+
+    def test_order_list(self):
+        self.assert_budget("order-list", "/api/store/api/orders/", self.make_order)
+
+    def test_admin_order_list(self):
+        self.client.force_authenticate(self.admin)
+        self.assert_budget("admin-order-list", "/api/store/api/admin/orders/", self.make_order)
+
+    def test_product_list(self):
+        grow = lambda n: [self.make_product() for _ in range(n)]
+        self.assert_budget("product-list", "/api/store/api/products/", grow)
+
+    def test_cart_summary_reads_only_the_cart_row(self):
+        self.fill_cart(3)
+        self.client.get("/api/store/api/cart/")
+        with self.assertNumQueries(2):  # ETag validator + cart row
+            response = self.client.get("/api/store/api/cart/", {"summary": 1})
+        self.assertEqual(response.data["item_count"], 6)
+        self.assertEqual(Decimal(response.data["total"]), Decimal("60.00"))
+
+
+class KeysetPaginationTests(StoreAPITestCase):
+    url = "/api/store/api/products/"
+
+    def walk(self, url, **params):
+        """Follow ``next`` links from the first page; return each page's ids."""
+        pages = []
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            pages.append([row["id"] for row in response.data["results"]])
+            if not response.data["next"]:
+                return pages
+            response = self.client.get(response.data["next"])
+
+    def test_cursor_walks_every_row_once_newest_first(self):
+        products = [self.make_product() for _ in range(5)]
+        pages = self.walk(self.url, page_size=2)
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertEqual(sum(pages, []), [p.pk for p in reversed(products)])
+
+        response = self.client.get(self.url, {"page_size": 2})
+        second = self.client.get(response.data["next"])
+        previous = self.client.get(second.data["previous"])
+        self.assertEqual(previous.data["results"], response.data["results"])
+
+    def test_ties_on_created_at_are_neither_skipped_nor_repeated(self):
+        products = [self.make_product() for _ in range(5)]
+        Product.objects.update(created_at=timezone.now())
+        pages = self.walk(self.url, page_size=2)
+        self.assertEqual(sum(pages, []), [p.pk for p in reversed(products)])
+
+    def test_page_size_is_capped_and_read_per_request(self):
+        for _ in range(105):
+            self.make_product()
+        response = self.client.get(self.url, {"page_size": 1000})
+        self.assertEqual(len(response.data["results"]), 100)
+        with self.settings(STORE_PAGE_SIZE=3):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.data["results"]), 3)
+
+    def test_admin_orders_page_through_every_order(self):
+        orders = [self.make_order(1) for _ in range(5)]
+        Order.objects.filter(pk__in=[o.pk for o in orders[:3]]).update(created_at=timezone.now())
+        self.client.force_authenticate(self.admin)
+        pages = self.walk("/api/store/api/admin/orders/", page_size=2)
+        self.assertEqual(sorted(sum(pages, [])), sorted(o.pk for o in orders))
+        self.assertEqual(len(sum(pages, [])), len(orders))
+
+
+class CheckoutTests(StoreAPITestCase):
+    url = "/api/store/api/orders/"
+    payload = {"shipping_address": "221B Baker Street", "phone": "555"}
+
+    def test_checkout_decrements_stock_and_totals_order(self):
+        a = self.make_product(price=Decimal("5.00"), stock=3)
+        b = self.make_product(price=Decimal("7.50"), stock=1)
+        CartItem.objects.create(cart=self.cart, product=a, quantity=3, price=a.price)
+        CartItem.objects.create(cart=self.cart, product=b, quantity=1, price=b.price)
+
+        response = self.client.post(self.url, self.payload, format="json")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Decimal(response.data["total_price"]), Decimal("22.50"))
+        self.assertEqual(len(response.data["items"]), 2)
+        a.refresh_from_db()
+        b.refresh_from_db()
+        self.assertEqual((a.stock, b.stock), (0, 0))
+        self.assertFalse(self.cart.items.exists())
+
+    def test_insufficient_stock_rolls_back_everything(self):
+        a = self.make_product(stock=5)
+        b = self.make_product(stock=1)
+        CartItem.objects.create(cart=self.cart, product=a, quantity=2, price=a.price)
+        CartItem.objects.create(cart=self.cart, product=b, quantity=2, price=b.price)
+
+        response = self.client.post(self.url, self.payload, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["products"], [b.pk])
+        a.refresh_from_db()
+        self.assertEqual(a.stock, 5)
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(self.cart.items.count(), 2)
+
+    def test_confirmation_is_queued_with_the_order(self):
+        self.user.email = "buyer@example.com"
+        self.user.save()
+        a = self.make_product(stock=1)
+        CartItem.objects.create(cart=self.cart, product=a, quantity=2, price=a.price)
+        self.assertEqual(self.client.post(self.url, self.payload, format="json").status_code, 400)
+        self.assertFalse(Job.objects.exists())
+
+        self.cart.items.update(quantity=1)
+        order_id = self.client.post(self.url, self.payload, format="json").data["id"]
+        self.assertEqual(
+            list(Job.objects.order_by("pk").values_list("name", "payload")),
+            [(ORDER_CONFIRMATION, {"order_id": order_id}), (SALES_ROLLUP, {"order_id": order_id})],
+        )
+        self.assertEqual(mail.outbox, [])
+        jobs.work(once=True)
+        self.assertEqual([m.subject for m in mail.outbox], [f"Order #{order_id} confirmed"])
+        self.assertFalse(Job.objects.exists())
+
+    def test_checkout_query_count_is_independent_of_cart_size(self):
+        self.client.get("/api/store/api/cart/")
+        counts = []
+        for n in (1, 10):
+            self.fill_cart(n)
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.post(self.url, self.payload, format="json")
+            self.assertEqual(response.status_code, 201)
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+
+class ProductSearchTests(StoreAPITestCase):
+    url = "/api/store/api/products/"
+
+    def test_search_ranks_name_matches_first_and_tracks_edits(self):
+        desc_hit = self.make_product(name="Mug", description="Fits a walrus-sized espresso")
+        name_hit = self.make_product(name="Espresso machine")
+        self.make_product(name="Kettle")
+
+        response = self.client.get(self.url, {"q": "espresso"})
+        self.assertEqual([p["id"] for p in response.data["results"]], [name_hit.pk, desc_hit.pk])
+
+        name_hit.name = "Coffee grinder"
+        name_hit.save()
+        response = self.client.get(self.url, {"q": "espresso"})
+        self.assertEqual([p["id"] for p in response.data["results"]], [desc_hit.pk])
+
+        desc_hit.delete()
+        response = self.client.get(self.url, {"q": "espresso"})
+        self.assertEqual(response.data["results"], [])
+
+    def test_inactive_matches_do_not_use_up_the_page(self):
+        for n in range(3):
+            self.make_product(name=f"Espresso espresso cup {n}", is_active=False)
+        active = self.make_product(name="Kettle", description="espresso")
+
+        for url in (self.url, "/api/store/async/products/"):
+            response = self.client.get(url, {"q": "espresso", "page_size": 1})
+            self.assertEqual([p["id"] for p in response.json()["results"]], [active.pk])
+
+    def test_search_by_category_prefix_and_hostile_input(self):
+        product = self.make_product(name="Atlas")
+        self.category.name = "Cartography"
+        self.category.save()
+
+        response = self.client.get(self.url, {"q": "cartog"})
+        self.assertEqual([p["id"] for p in response.data["results"]], [product.pk])
+
+        response = self.client.get(self.url, {"q": '"AND OR NEAR( *'})
+        self.assertEqual(response.status_code, 200)
+
+
+class CatalogCacheTests(StoreAPITestCase):
+    url = "/api/store/api/products/"
+
+    def test_repeat_requests_are_served_without_queries(self):
+        self.make_product()
+        first = self.client.get(self.url, {"page_size": 5, "q": ""})
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url, {"q": "", "page_size": 5})
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(first.data, second.data)
+        stats = catalog_cache.stats()
+        # one miss each for the payload and its memoized ETag version
+        self.assertEqual((stats["misses"], stats["local_hits"]), (2, 2))
+
+    def test_product_and_category_writes_invalidate(self):
+        product = self.make_product(name="Old name")
+        self.client.get(self.url)
+
+        product.name = "New name"
+        product.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["results"][0]["name"], "New name")
+
+        self.category.name = "Comics"
+        self.category.save()
+        response = self.client.get(f"{self.url}{product.pk}/")
+        self.assertEqual(response.data["category"]["name"], "Comics")
+
+    def test_local_entries_expire(self):
+        local = CatalogCache(max_entries=10, timeout=60)
+        now = [1000.0]
+        local.timer = lambda: now[0]
+        local.set("/products/", {"results": []})
+        now[0] += 59
+        self.assertEqual(local.get("/products/"), {"results": []})
+        now[0] += 1
+        self.assertIsNone(local.get("/products/"))
+        self.assertEqual(local.stats()["entries"], 0)
+
+    def test_checkout_invalidates_cached_stock(self):
+        product = self.make_product(stock=5)
+        CartItem.objects.create(cart=self.cart, product=product, quantity=2, price=product.price)
+        self.client.get(f"{self.url}{product.pk}/")
+
+        self.client.post("/api/store/api/orders/", {"shipping_address": "x", "phone": "1"}, format="json")
+        response = self.client.get(f"{self.url}{product.pk}/")
+        self.assertEqual(response.data["stock"], 3)
+
+
+class ConditionalGetTests(StoreAPITestCase):
+
+    def test_product_list_304_until_catalog_changes(self):
+        product = self.make_product()
+        url = "/api/store/api/products/"
+        etag = self.client.get(url)["ETag"]
+
+        catalog_cache.clear()  # a cold cache still answers 304 from the aggregate alone
+        with self.assertNumQueries(2):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.category.name = "Renamed"
+        self.category.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+        other_page = self.client.get(url, {"page_size": 1})
+        self.assertNotEqual(other_page["ETag"], response["ETag"])
+        self.assertIn("Last-Modified", response)
+
+    def test_cart_etag_changes_on_mutation(self):
+        product = self.make_product()
+        url = "/api/store/api/cart/"
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.client.post(url, {"product_id": product.pk, "quantity": 1}, format="json")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["items"]), 1)
+
+
+class CartSummaryTests(StoreAPITestCase):
+    url = "/api/store/api/cart/"
+
+    def test_mutations_keep_summary_in_sync(self):
+        a = self.make_product(price=Decimal("2.50"))
+        b = self.make_product(price=Decimal("4.00"))
+        self.client.post(self.url, {"product_id": a.pk, "quantity": 2}, format="json")
+        self.client.post(self.url, {"product_id": a.pk, "quantity": 1}, format="json")
+        response = self.client.post(self.url, {"product_id": b.pk, "quantity": 1}, format="json")
+        self.assertEqual((response.data["item_count"], Decimal(response.data["total"])), (4, Decimal("11.50")))
+
+        item_a = self.cart.items.get(product=a)
+        response = self.client.put(f"{self.url}{item_a.pk}/", {"quantity": 1}, format="json")
+        self.assertEqual((response.data["item_count"], Decimal(response.data["total"])), (2, Decimal("6.50")))
+
+        item_b = self.cart.items.get(product=b)
+        response = self.client.delete(f"{self.url}{item_b.pk}/")
+        self.assertEqual((response.data["item_count"], Decimal(response.data["total"])), (1, Decimal("2.50")))
+
+    def test_summary_without_cart(self):
+        self.cart.delete()
+        response = self.client.get(self.url, {"summary": "1"})
+        self.assertEqual(response.data["item_count"], 0)
+        self.assertFalse(Cart.objects.filter(user=self.user).exists())
+
+
+class CartUpsertTests(StoreAPITestCase):
+    url = "/api/store/api/cart/"
+
+    def test_repeated_add_merges_into_one_line(self):
+        product = self.make_product()
+        for _ in range(3):
+            response = self.client.post(self.url, {"product_id": product.pk, "quantity": 2}, format="json")
+            self.assertEqual(response.status_code, 201)
+        item = CartItem.objects.get(cart=self.cart)
+        self.assertEqual((item.quantity, item.price), (6, product.price))
+
+    def test_unknown_product_is_rejected(self):
+        response = self.client.post(self.url, {"product_id": 999999, "quantity": 1}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("product_id", response.data)
+        self.assertFalse(CartItem.objects.exists())
+
+    def test_cart_id_is_resolved_once(self):
+        product = self.make_product()
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post(self.url, {"product_id": product.pk, "quantity": 1}, format="json")
+        statements = [q["sql"] for q in ctx.captured_queries]
+        self.assertFalse(any('"store_cart"."user_id" =' in sql for sql in statements))
+        self.assertEqual(sum("INSERT" in sql for sql in statements), 2)  # cart line + stock reservation
+
+    def test_update_and_destroy_other_users_item_404(self):
+        other = User.objects.create_user(username="other", password="pass12345")
+        other_cart = Cart.objects.create(user=other)
+        product = self.make_product()
+        item = CartItem.objects.create(cart=other_cart, product=product, quantity=1, price=product.price)
+        self.assertEqual(self.client.put(f"{self.url}{item.pk}/", {"quantity": 3}, format="json").status_code, 404)
+        self.assertEqual(self.client.delete(f"{self.url}{item.pk}/").status_code, 404)
+        item.refresh_from_db()
+        self.assertEqual(item.quantity, 1)
+
+
+class StockReservationTests(StoreAPITestCase):
+    url = "/api/store/api/cart/"
+
+    def setUp(self):
+        super().setUp()
+        self.product = self.make_product(stock=5)
+        self.other = User.objects.create_user(username="other", password="pass12345")
+        self.other_client = APIClient()
+        self.other_client.force_authenticate(self.other)
+
+    def add(self, client, quantity):
+        return client.post(self.url, {"product_id": self.product.pk, "quantity": quantity}, format="json")
+
+    def reserved(self):
+        return Product.objects.values_list("reserved", flat=True).get(pk=self.product.pk)
+
+    def test_add_to_cart_holds_available_stock(self):
+        self.assertEqual(self.add(self.client, 3).status_code, 201)
+        response = self.add(self.other_client, 3)
+        self.assertEqual((response.status_code, response.data["products"]), (400, [self.product.pk]))
+        self.assertFalse(CartItem.objects.filter(cart__user=self.other).exists())
+        self.assertEqual(self.add(self.other_client, 2).status_code, 201)
+        self.assertEqual(self.reserved(), 5)
+
+        item = self.cart.items.get()
+        self.assertEqual(self.client.put(f"{self.url}{item.pk}/", {"quantity": 4}, format="json").status_code, 400)
+        self.assertEqual(self.client.put(f"{self.url}{item.pk}/", {"quantity": 1}, format="json").status_code, 200)
+        self.assertEqual(self.reserved(), 3)
+        self.client.delete(f"{self.url}{item.pk}/")
+        self.assertEqual(self.reserved(), 2)
+        self.assertFalse(StockReservation.objects.filter(cart=self.cart).exists())
+
+    def test_deleting_a_cart_releases_its_holds(self):
+        self.add(self.client, 3)
+        self.cart.delete()
+        self.assertEqual(self.reserved(), 0)
+
+        self.add(self.other_client, 2)
+        self.other.delete()  # cart cascades from the user
+        self.assertEqual(self.reserved(), 0)
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_checkout_converts_reservations(self):
+        self.add(self.client, 2)
+        self.add(self.other_client, 3)
+        response = self.client.post("/api/store/api/orders/", {"shipping_address": "x", "phone": "1"}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.stock, self.product.reserved), (3, 3))
+        self.assertFalse(StockReservation.objects.filter(cart=self.cart).exists())
+
+    def test_checkout_releases_holds_without_a_line(self):
+        other = self.make_product(stock=5)
+        self.add(self.client, 2)
+        self.client.post(self.url, {"product_id": other.pk, "quantity": 1}, format="json")
+        CartItem.objects.filter(cart=self.cart, product=other).delete()  # outside the cart endpoints
+
+        response = self.client.post("/api/store/api/orders/", {"shipping_address": "x", "phone": "1"}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Product.objects.get(pk=other.pk).reserved, 0)
+        self.assertEqual(self.reserved(), 0)
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_admin_cart_edits_move_holds(self):
+        other = self.make_product(stock=5)
+        self.add(self.client, 2)
+        self.client.post(self.url, {"product_id": other.pk, "quantity": 1}, format="json")
+        lines = {line.product_id: line for line in self.cart.items.all()}
+        admin_client = Client()
+        admin_client.force_login(self.admin)
+
+        def save(quantity):
+            data = {
+                "user": self.user.pk, "session_key": "",
+                "items-TOTAL_FORMS": 2, "items-INITIAL_FORMS": 2, "items-MIN_NUM_FORMS": 0, "items-MAX_NUM_FORMS": 1000,
+            }
+            for n, (product_id, line) in enumerate(lines.items()):
+                data.update({f"items-{n}-id": line.pk, f"items-{n}-cart": self.cart.pk,
+                             f"items-{n}-product": product_id, f"items-{n}-quantity": line.quantity})
+                if product_id == other.pk:
+                    data[f"items-{n}-DELETE"] = "on"
+                else:
+                    data[f"items-{n}-quantity"] = quantity
+            return admin_client.post(f"/admin/store/cart/{self.cart.pk}/change/", data)
+
+        self.assertEqual(save(6).status_code, 200)  # more than the stock: form error, nothing saved
+        self.assertEqual(self.reserved(), 2)
+        self.assertEqual(save(4).status_code, 302)
+        self.assertEqual((self.reserved(), Product.objects.get(pk=other.pk).reserved), (4, 0))
+        self.assertEqual(dict(self.cart.reservations.values_list("product_id", "quantity")), {self.product.pk: 4})
+
+    def test_sweeper_releases_expired_in_batches(self):
+        self.add(self.client, 2)
+        self.add(self.other_client, 3)
+        StockReservation.objects.filter(cart__user=self.user).update(expires_at=timezone.now())
+        self.assertEqual(reservations.release_expired(batch_size=1), 1)
+        self.assertEqual(self.reserved(), 3)
+
+        later = timezone.now() + datetime.timedelta(hours=1)
+        self.assertEqual(reservations.release_expired(batch_size=1, now=later), 1)
+        self.assertEqual(self.reserved(), 0)
+
+        # the line outlived its hold: checkout takes from available stock instead
+        response = self.client.post("/api/store/api/orders/", {"shipping_address": "x", "phone": "1"}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Product.objects.get(pk=self.product.pk).stock, 3)
+
+
+class CartBulkTests(StoreAPITestCase):
+    url = "/api/store/api/cart/bulk/"
+
+    def test_bulk_applies_operations_in_order(self):
+        a, b, c = self.make_product(), self.make_product(), self.make_product()
+        CartItem.objects.create(cart=self.cart, product=c, quantity=5, price=c.price)
+        operations = [
+            {"product_id": a.pk, "quantity": 2},
+            {"product_id": a.pk, "quantity": 1},
+            {"product_id": b.pk, "quantity": 4, "action": "set"},
+            {"product_id": c.pk, "action": "remove"},
+        ]
+        response = self.client.post(self.url, {"operations": operations}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        lines = {item["product"]["id"]: item["quantity"] for item in response.data["items"]}
+        self.assertEqual(lines, {a.pk: 3, b.pk: 4})
+        self.assertEqual(response.data["item_count"], 7)
+
+    def test_unknown_product_rejects_whole_batch(self):
+        a = self.make_product()
+        operations = [{"product_id": a.pk, "quantity": 1}, {"product_id": 424242, "quantity": 1}]
+        response = self.client.post(self.url, {"operations": operations}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["products"], [424242])
+        self.assertFalse(CartItem.objects.exists())
+
+    def test_query_count_is_independent_of_batch_size(self):
+        self.client.get("/api/store/api/cart/")
+        counts = []
+        for n in (2, 40):
+            operations = [{"product_id": self.make_product().pk, "quantity": 1} for _ in range(n)]
+            with CaptureQueriesContext(connection) as ctx:
+                self.client.post(self.url, {"operations": operations}, format="json")
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+
+class FastProductSerializerTests(StoreAPITestCase):
+    """The .values() fast path must render byte-identical JSON to ProductSerializer."""
+
+    def test_rendered_json_matches_product_serializer(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.enterContext(self.settings(MEDIA_ROOT=media_root))
+
+        self.make_product(name="Plain", price=Decimal("19.90"), description="")
+        self.make_product(name="Ünïcode ✓", price=Decimal("0.05"), description="línea\n\"quoted\"", stock=0)
+        with_image = self.make_product(name="Pictured", price=Decimal("12345678.00"))
+        with_image.image.save("p.png", SimpleUploadedFile("p.png", b"x"), save=True)
+
+        request = APIRequestFactory().get("/api/store/api/products/")
+        queryset = Product.objects.select_related("category").order_by("-created_at", "-id")
+        expected = ProductSerializer(queryset, many=True, context={"request": request}).data
+        actual = serialize_products(product_values(queryset), request)
+
+        renderer = JSONRenderer()
+        self.assertEqual(renderer.render(actual), renderer.render(expected))
+
+    def test_api_retrieve_404(self):
+        response = self.client.get("/api/store/api/products/999999/")
+        self.assertEqual(response.status_code, 404)
+
+
+class RendererTests(StoreAPITestCase):
+
+    def test_fast_json_matches_stdlib_renderer(self):
+        order = self.make_order(3)
+        payload = {
+            "order": OrderSerializer(order).data,
+            "raw": {"when": order.created_at, "amount": Decimal("1.50"), 7: "int key", "sep": "a\u2028b"},
+        }
+        self.assertEqual(FastJSONRenderer().render(payload), JSONRenderer().render(payload))
+
+    @unittest.skipIf(msgpack is None, "msgpack is not installed")
+    def test_msgpack_negotiation_round_trip(self):
+        product = self.make_product()
+        body = msgpack.packb({"product_id": product.pk, "quantity": 2})
+        response = self.client.post(
+            "/api/store/api/cart/", body, content_type="application/msgpack", HTTP_ACCEPT="application/msgpack"
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        data = msgpack.unpackb(response.content, raw=False)
+        self.assertEqual(data["items"][0]["quantity"], 2)
+
+
+class SparseFieldsetTests(StoreAPITestCase):
+
+    def test_order_lines_default_to_compact_product_reference(self):
+        self.make_order(2)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/store/api/orders/")
+        product = response.data[0]["items"][0]["product"]
+        self.assertEqual(list(product), ["id", "name", "slug", "price"])
+        self.assertFalse(any("description" in q["sql"] for q in ctx.captured_queries))
+
+        response = self.client.get("/api/store/api/orders/", {"expand": "product"})
+        product = response.data[0]["items"][0]["product"]
+        self.assertEqual(product["category"]["name"], "Books")
+
+    def test_fields_prune_nested_output_and_skip_prefetch(self):
+        self.fill_cart(2)
+        response = self.client.get("/api/store/api/cart/", {"fields": "id,total,items.quantity,items.product.name"})
+        self.assertEqual(list(response.data), ["id", "items", "total"])
+        self.assertEqual(response.data["items"][0], {"product": {"name": "Product 1"}, "quantity": 2})
+
+        with self.assertNumQueries(2):  # ETag validator + cart row, no items prefetch
+            response = self.client.get("/api/store/api/cart/", {"fields": "id,item_count"})
+        self.assertEqual(list(response.data), ["id", "item_count"])
+
+    def test_product_fast_path_honours_fields_like_the_serializer(self):
+        self.make_product(description="long text")
+        fields = "id,price,category.name,updated_at"
+        request = APIRequestFactory().get("/api/store/api/products/", {"fields": fields})
+        queryset = Product.objects.select_related("category")
+        expected = ProductSerializer(queryset, many=True, context={"request": request}).data
+
+        response = self.client.get("/api/store/api/products/", {"fields": fields})
+        self.assertEqual(JSONRenderer().render(response.data["results"]), JSONRenderer().render(expected))
+
+
+class MetricsTests(StoreAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        registry.reset()
+
+    def test_actions_are_labelled_and_exposed(self):
+        self.make_product()
+        self.client.get("/api/store/api/products/")
+        self.client.get("/api/store/api/cart/")
+
+        body = self.client.get("/metrics").content.decode()
+        self.assertIn(
+            'http_request_duration_seconds_count{view="ProductViewSet.list",method="GET",status="200"} 1', body
+        )
+        self.assertIn('http_request_db_queries_count{view="CartViewSet.list",method="GET",status="200"} 1', body)
+        self.assertIn('http_response_size_bytes_bucket{view="ProductViewSet.list",method="GET",status="200",le="+Inf"} 1', body)
+        self.assertNotIn('view="metrics"', body)
+
+    def test_queries_are_counted_under_asgi(self):
+        self.make_product()
+        response = async_to_sync(AsyncClient().get)("/api/store/api/products/")
+        self.assertEqual(response.status_code, 200)
+        series = merge([registry.snapshot()])[("ProductViewSet.list", "GET", "200")]
+        self.assertGreater(series["http_request_db_queries"]["sum"], 0)
+        self.assertGreater(series["http_request_db_seconds_total"], 0)
+
+    def test_endpoint_is_private(self):
+        self.assertEqual(self.client.get("/metrics", REMOTE_ADDR="203.0.113.9").status_code, 403)
+        with self.settings(METRICS={"TOKEN": "s3cret"}):
+            self.assertEqual(self.client.get("/metrics").status_code, 403)
+            response = self.client.get("/metrics", REMOTE_ADDR="203.0.113.9", HTTP_AUTHORIZATION="Bearer s3cret")
+            self.assertEqual(response.status_code, 200)
+
+    def test_worker_snapshots_are_summed(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.client.get("/api/store/api/categories/")
+        registry.flush(directory)
+        os.rename(os.path.join(directory, f"worker-{os.getpid()}.json"), os.path.join(directory, "worker-1.json"))
+
+        with self.settings(METRICS={"MULTIPROCESS_DIR": directory}):
+            body = self.client.get("/metrics").content.decode()
+        # this process's own sample plus the "other worker's" identical one
+        self.assertIn('http_request_duration_seconds_count{view="CategoryViewSet.list",method="GET",status="200"} 2', body)
+
+
+class ProfilingTests(StoreAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.profile_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.profile_dir)
+        self.enterContext(self.settings(PROFILING={"DIR": self.profile_dir, "KEEP": 2}))
+
+    def test_staff_header_writes_profile_and_sql(self):
+        self.make_product()
+        client = APIClient()
+        client.login(username="admin", password="pass12345")
+
+        response = client.get("/api/store/api/products/", HTTP_X_PROFILE="1")
+        name = response["X-Profile-Id"]
+        files = sorted(os.listdir(self.profile_dir))
+        self.assertEqual(files, [f"{name}.prof", f"{name}.sql.txt"])
+        with open(os.path.join(self.profile_dir, f"{name}.sql.txt")) as f:
+            self.assertIn("store_product", f.read())
+
+    def test_asgi_profile_records_the_views_sql(self):
+        self.make_product()
+        token = AccessToken.for_user(self.admin)
+        response = async_to_sync(AsyncClient().get)(
+            "/api/store/api/products/", headers={"Authorization": f"Bearer {token}", "X-Profile": "1"}
+        )
+        name = response["X-Profile-Id"]
+        self.assertTrue(os.path.exists(os.path.join(self.profile_dir, f"{name}.folded")))
+        with open(os.path.join(self.profile_dir, f"{name}.sql.txt")) as f:
+            sql = f.read()
+        self.assertNotIn("-- 0 statements", sql)
+        self.assertIn("store_product", sql)
+
+    def test_header_ignored_for_non_staff_and_rotation_keeps_newest(self):
+        client = APIClient()
+        client.login(username="buyer", password="pass12345")
+        self.assertNotIn("X-Profile-Id", client.get("/api/store/api/categories/", HTTP_X_PROFILE="1"))
+
+        client.login(username="admin", password="pass12345")
+        names = [client.get("/api/store/api/categories/", HTTP_X_PROFILE="1")["X-Profile-Id"] for _ in range(3)]
+        remaining = {f.removesuffix(".prof").removesuffix(".sql.txt") for f in os.listdir(self.profile_dir)}
+        self.assertEqual(remaining, set(names[1:]))
+
+
+class AsyncReadPathTests(StoreAPITestCase):
+    """The ASGI-native views return what the DRF endpoints return."""
+
+    def setUp(self):
+        super().setUp()
+        for _ in range(3):
+            self.make_product()
+        self.fill_cart(2)
+        self.make_order(2)
+        self.async_client = AsyncClient()
+        self.auth = {"Authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+
+    async def assert_same(self, sync_path, async_path):
+        expected = await sync_to_async(self.client.get)(sync_path, HTTP_ACCEPT="application/json")
+        response = await self.async_client.get(async_path, headers=self.auth)
+        self.assertEqual(response.status_code, 200)
+        # pagination links point back at whichever prefix served the page
+        expected = expected.content.decode().replace("/api/store/api/", "/api/store/async/")
+        self.assertEqual(response.json(), json.loads(expected))
+
+    async def test_payloads_match_sync_endpoints(self):
+        product = await Product.objects.order_by("pk").afirst()
+        await self.assert_same("/api/store/api/categories/", "/api/store/async/categories/")
+        await self.assert_same("/api/store/api/products/?page_size=2", "/api/store/async/products/?page_size=2")
+        await self.assert_same("/api/store/api/products/?q=product", "/api/store/async/products/?q=product")
+        await self.assert_same(f"/api/store/api/products/{product.pk}/", f"/api/store/async/products/{product.pk}/")
+        await self.assert_same("/api/store/api/cart/?fields=id,items.quantity", "/api/store/async/cart/?fields=id,items.quantity")
+        await self.assert_same("/api/store/api/cart/?summary=1", "/api/store/async/cart/?summary=1")
+        await self.assert_same("/api/store/api/orders/?expand=product", "/api/store/async/orders/?expand=product")
+
+    async def test_catalog_cache_and_conditional_get(self):
+        first = await self.async_client.get("/api/store/async/products/")
+        second = await self.async_client.get("/api/store/async/products/", headers={"If-None-Match": first["ETag"]})
+        self.assertEqual(first["X-Cache"], "MISS")
+        self.assertEqual(second.status_code, 304)
+        third = await self.async_client.get("/api/store/async/products/")
+        self.assertEqual(third["X-Cache"], "HIT")
+        self.assertEqual((await self.async_client.get("/api/store/async/products/999999/")).status_code, 404)
+
+    async def test_private_reads_require_a_valid_token(self):
+        self.assertEqual((await AsyncClient().get("/api/store/async/cart/")).status_code, 401)
+        bad = {"Authorization": "Bearer nope"}
+        self.assertEqual((await self.async_client.get("/api/store/async/orders/", headers=bad)).status_code, 401)
+        self.assertEqual((await self.async_client.post("/api/store/async/cart/", headers=self.auth)).status_code, 405)
+
+
+class OpenAPISchemaTests(StoreAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        openapi.reset()
+        self.addCleanup(openapi.reset)
+
+    def test_schema_built_once_and_served_compressed(self):
+        response = self.client.get("/openapi.json", HTTP_ACCEPT_ENCODING="gzip, br")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        schema = json.loads(gzip.decompress(response.content))
+        self.assertIn("/store/api/products/", schema["paths"])
+
+        plain = self.client.get("/openapi.json")
+        self.assertEqual(json.loads(plain.content), schema)
+        self.assertEqual(self.client.get("/openapi.json", HTTP_IF_NONE_MATCH=plain["ETag"]).status_code, 304)
+
+        # the encodings are distinct representations: neither validates the other
+        self.assertNotEqual(response["ETag"], plain["ETag"])
+        self.assertIn("Accept-Encoding", response["Vary"])
+        revalidated = self.client.get(
+            "/openapi.json", HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(
+            self.client.get("/openapi.json", HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=plain["ETag"]).status_code,
+            200,
+        )
+        self.assertContains(self.client.get("/swagger/"), "/openapi.json")
+
+    def test_prebuilt_file_is_served(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        openapi.write(directory, b'{"swagger": "2.0", "paths": {}}')
+        with self.settings(API_DOCS={"ENABLED": False, "SCHEMA_DIR": directory}):
+            response = self.client.get("/openapi.json")
+        self.assertEqual(response.content, b'{"swagger": "2.0", "paths": {}}')
+
+
+class OrderExportTests(StoreAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.admin)
+        self.old = self.make_order(2)
+        Order.objects.filter(pk=self.old.pk).update(created_at=timezone.make_aware(datetime.datetime(2025, 1, 5, 12)))
+        self.new = self.make_order(1)
+        self.empty = Order.objects.create(user=self.user, shipping_address="y", phone="2")
+
+    def stream(self, path):
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_csv_has_one_row_per_line_item(self):
+        rows = list(csv.reader(io.StringIO(self.stream("/api/store/api/admin/orders/export/csv/"))))
+        self.assertEqual(tuple(rows[0]), exports.COLUMNS)
+        self.assertEqual([int(r[0]) for r in rows[1:]], [self.old.pk] * 2 + [self.new.pk, self.empty.pk])
+        self.assertEqual(rows[-1][8:], ["", "", "", "", ""])
+
+    def test_jsonl_nests_items_and_filters_by_date(self):
+        body = self.stream("/api/store/api/admin/orders/export/jsonl/?since=2025-01-01&until=2025-01-05")
+        orders = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([o["order_id"] for o in orders], [self.old.pk])
+        self.assertEqual(len(orders[0]["items"]), 2)
+        self.assertEqual(orders[0]["username"], "buyer")
+
+        self.assertEqual(self.client.get("/api/store/api/admin/orders/export/csv/?since=nope").status_code, 400)
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get("/api/store/api/admin/orders/export/csv/").status_code, 403)
+
+    def test_command_writes_file(self):
+        out = io.StringIO()
+        call_command("export_orders", "--format", "jsonl", "--since", "2026-01-01", stdout=out, stderr=io.StringIO())
+        self.assertEqual(len(out.getvalue().splitlines()), 2)
+
+
+class ProductImportTests(StoreAPITestCase):
+
+    def import_file(self, content, suffix=".csv"):
+        with tempfile.NamedTemporaryFile("w", suffix=suffix, delete=False) as f:
+            f.write(content)
+        self.addCleanup(os.remove, f.name)
+        out = io.StringIO()
+        call_command("import_products", f.name, "--batch-size", "2", stdout=out, stderr=io.StringIO())
+        return out.getvalue()
+
+    def test_csv_upsert_is_idempotent(self):
+        content = (
+            "name,category,price,stock,description\n"
+            "Blue Mug,Kitchen,9.50,3,Holds tea\n"
+            "Blue Mug,Kitchen,12.00,1,Bigger\n"
+            "Atlas,Books,30,7,\n"
+            "Broken,Books,free,1,\n"
+        )
+        self.assertIn("3 products upserted, 1 skipped", self.import_file(content))
+        self.assertIn("3 products upserted", self.import_file(content))
+
+        products = {p.slug: p for p in Product.objects.select_related("category")}
+        self.assertEqual(sorted(products), ["atlas", "blue-mug", "blue-mug-2"])
+        self.assertEqual(products["blue-mug-2"].price, Decimal("12.00"))
+        self.assertEqual(products["atlas"].category, self.category)
+        self.assertEqual(Category.objects.get(name="Kitchen").slug, "kitchen")
+
+        response = self.client.get("/api/store/api/products/", {"q": "tea"})
+        self.assertEqual([p["slug"] for p in response.data["results"]], ["blue-mug"])
+
+    def test_partial_columns_leave_others_untouched(self):
+        self.import_file('{"name": "Lamp", "category": "Home", "price": "20", "description": "Warm"}\n', ".jsonl")
+        self.import_file('{"name": "Lamp", "category": "Home", "price": "25", "stock": 4}\n', ".jsonl")
+        lamp = Product.objects.get(slug="lamp")
+        self.assertEqual((lamp.price, lamp.stock, lamp.description), (Decimal("25.00"), 4, "Warm"))
+
+    def test_suffixed_slugs_skip_unrelated_products(self):
+        widget_2 = self.make_product(name="Widget 2", price=Decimal("99.00"))
+        content = "name,category,price\nWidget,Books,1.00\nWidget,Books,2.00\n"
+        self.import_file(content)
+        self.import_file(content)
+        widget_2.refresh_from_db()
+        self.assertEqual((widget_2.name, widget_2.price), ("Widget 2", Decimal("99.00")))
+        prices = dict(Product.objects.filter(name="Widget").values_list("slug", "price"))
+        self.assertEqual(prices, {"widget": Decimal("1.00"), "widget-3": Decimal("2.00")})
+
+    def test_bad_rows_are_skipped_not_fatal(self):
+        content = (
+            '{"name": "Lamp", "category": "Home", "price": "20"\n'
+            '["Lamp", "Home", "20"]\n'
+            '{"name": "Yacht", "category": "Home", "price": "123456789"}\n'
+            '{"name": "Rug", "category": "Home", "price": "99999999.99", "is_active": ""}\n'
+        )
+        self.assertIn("1 products upserted, 3 skipped", self.import_file(content, ".jsonl"))
+        rug = Product.objects.get()
+        self.assertEqual((rug.slug, rug.price, rug.is_active), ("rug", Decimal("99999999.99"), True))
+
+
+class ProductBulkUpdateTests(StoreAPITestCase):
+    url = "/api/store/api/products/bulk-update/"
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.admin)
+        self.a = self.make_product(slug="a")
+        self.b = self.make_product(slug="b", stock=5)
+
+    def test_rows_are_applied_and_reported(self):
+        self.client.get("/api/store/api/products/")  # warm the catalog cache
+        rows = [
+            {"id": self.a.pk, "price": "12.50"},
+            {"slug": "b", "stock": 5},
+            {"slug": "missing", "stock": 1},
+            {"id": self.a.pk, "price": "1.234"},
+            {"price": 3},
+            {"slug": "b", "stock": 7},
+        ]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(self.url, rows, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [r["status"] for r in response.data["results"]],
+            ["updated", "updated", "not_found", "invalid", "invalid", "updated"],
+        )
+        self.assertEqual(response.data["results"][3]["errors"], {"price": ["Ensure that there are no more than 2 decimal places."]})
+        self.assertEqual((response.data["updated"], response.data["invalid"]), (3, 2))
+        # lookups by id and by slug, then one UPDATE
+        self.assertEqual(sum(q["sql"].startswith("UPDATE") for q in ctx.captured_queries), 1)
+
+        self.a.refresh_from_db()
+        self.b.refresh_from_db()
+        self.assertEqual((self.a.price, self.a.stock, self.b.stock), (Decimal("12.50"), 100, 7))
+        self.assertEqual(self.client.get("/api/store/api/products/")["X-Cache"], "MISS")
+
+    def test_unchanged_push_writes_nothing(self):
+        before = Product.objects.get(pk=self.a.pk).updated_at
+        response = self.client.post(self.url, [{"id": self.a.pk, "price": "10.00", "stock": 100}], format="json")
+        self.assertEqual(response.data["results"], [{"index": 0, "id": self.a.pk, "status": "unchanged"}])
+        self.assertEqual(Product.objects.get(pk=self.a.pk).updated_at, before)
+
+    def test_admin_only_and_list_body(self):
+        self.assertEqual(self.client.post(self.url, {"id": 1}, format="json").status_code, 400)
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.post(self.url, [], format="json").status_code, 403)
+
+
+@override_settings(STORE_CHANGE_FEED={"SETTLE_SECONDS": 0})
+class OrderChangeFeedTests(StoreAPITestCase):
+    url = "/api/store/api/admin/orders/"
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.admin)
+        self.orders = [self.make_order(1) for _ in range(3)]
+
+    def poll(self, since=None, **params):
+        if since:
+            params["since"] = since
+        response = self.client.get(f"{self.url}changes/", params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_polls_return_only_what_changed(self):
+        page = self.poll(limit=2)
+        self.assertEqual([o["id"] for o in page["results"]], [o.pk for o in self.orders[:2]])
+        self.assertTrue(page["has_more"])
+        page = self.poll(page["next"], limit=2)
+        self.assertEqual([o["id"] for o in page["results"]], [self.orders[2].pk])
+        self.assertFalse(page["has_more"])
+
+        cursor = page["next"]
+        self.assertEqual(self.poll(cursor)["results"], [])
+        self.assertEqual(self.poll(cursor)["next"], cursor)
+
+        self.client.patch(f"{self.url}{self.orders[0].pk}/", {"status": "SHIPPED"}, format="json")
+        with CaptureQueriesContext(connection) as ctx:
+            page = self.poll(cursor)
+        self.assertEqual([(o["id"], o["status"]) for o in page["results"]], [(self.orders[0].pk, "SHIPPED")])
+        self.assertLessEqual(len(ctx.captured_queries), 2)  # changed orders + items prefetch
+
+    def test_status_transitions_are_logged(self):
+        order = self.orders[0]
+        self.client.patch(f"{self.url}{order.pk}/", {"status": "SHIPPED"}, format="json")
+        self.client.patch(f"{self.url}{order.pk}/", {"phone": "2"}, format="json")
+        self.client.delete(f"{self.url}{order.pk}/")
+        self.client.delete(f"{self.url}{order.pk}/")
+
+        response = self.client.get(f"{self.url}events/", {"order": order.pk})
+        events = [(e["from_status"], e["to_status"], e["actor"]) for e in response.data["results"]]
+        self.assertEqual(events, [("PENDING", "SHIPPED", self.admin.pk), ("SHIPPED", "CANCELLED", self.admin.pk)])
+        self.assertEqual(self.client.get(f"{self.url}events/", {"since": response.data["next"]}).data["results"], [])
+
+        event = OrderEvent.objects.first()
+        event.to_status = "PENDING"
+        with self.assertRaises(ValueError):
+            event.save()
+
+    def test_invalid_cursor_and_settle_window(self):
+        self.assertEqual(self.client.get(f"{self.url}changes/", {"since": "bogus"}).status_code, 400)
+        with self.settings(STORE_CHANGE_FEED={"SETTLE_SECONDS": 60}):
+            self.assertEqual(self.poll()["results"], [])
+
+
+class SalesRollupTests(StoreAPITestCase):
+    url = "/api/store/api/admin/reports/"
+
+    def setUp(self):
+        super().setUp()
+        self.other_category = Category.objects.create(name="Games")
+        self.book = self.make_product(price=Decimal("10.00"))
+        self.game = self.make_product(price=Decimal("25.00"), category=self.other_category)
+
+    def checkout(self, *lines):
+        for product, quantity in lines:
+            self.client.post("/api/store/api/cart/", {"product_id": product.pk, "quantity": quantity}, format="json")
+        response = self.client.post("/api/store/api/orders/", {"shipping_address": "x", "phone": "1"}, format="json")
+        self.assertEqual(response.status_code, 201)
+        return response.data["id"]
+
+    def report(self, path):
+        self.client.force_authenticate(self.admin)
+        response = self.client.get(f"{self.url}{path}")
+        self.client.force_authenticate(self.user)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_rollups_follow_placement_and_cancellation(self):
+        first = self.checkout((self.book, 2), (self.game, 1))
+        self.checkout((self.book, 1))
+        jobs.work(once=True)
+
+        daily = self.report("daily/")
+        self.assertEqual((daily["totals"]["orders"], daily["totals"]["revenue"]), (2, Decimal("55.00")))
+        self.assertEqual(daily["days"][0]["statuses"]["PENDING"]["orders"], 2)
+        products = self.report("top/products/")["results"]
+        self.assertEqual([(p["id"], p["orders"], p["units"]) for p in products], [(self.book.pk, 2, 3), (self.game.pk, 1, 1)])
+
+        self.client.force_authenticate(self.admin)
+        self.client.delete(f"/api/store/api/admin/orders/{first}/")
+        jobs.work(once=True)
+        self.assertEqual(jobs.claim(10), [])  # every job ran; nothing left to retry
+
+        daily = self.report("daily/")
+        self.assertEqual((daily["totals"]["orders"], daily["totals"]["revenue"]), (1, Decimal("10.00")))
+        self.assertEqual(daily["totals"]["statuses"]["CANCELLED"], {"orders": 1, "revenue": Decimal("45.00")})
+        categories = self.report("top/categories/")["results"]
+        self.assertEqual([(c["name"], c["units"], c["revenue"]) for c in categories], [("Books", 1, Decimal("10.00"))])
+
+    def test_apply_is_idempotent_and_rebuild_matches(self):
+        order_id = self.checkout((self.book, 2))
+        self.assertTrue(analytics.apply_order(order_id))
+        self.assertFalse(analytics.apply_order(order_id))
+        Order.objects.filter(pk=order_id).update(status="SHIPPED")
+        analytics.apply_order(order_id)
+        incremental = sorted(DailySales.objects.values_list("day", "status", "orders", "revenue"))
+
+        analytics.rebuild()
+        rebuilt = sorted(DailySales.objects.values_list("day", "status", "orders", "revenue"))
+        self.assertEqual([r for r in incremental if r[2]], rebuilt)
+        self.assertEqual(DailyProductSales.objects.get().units, 2)
+
+    def test_reports_are_admin_only_and_validate_dates(self):
+        self.assertEqual(self.client.get(f"{self.url}daily/").status_code, 403)
+        self.client.force_authenticate(self.admin)
+        self.assertEqual(self.client.get(f"{self.url}daily/", {"since": "2024-02-30"}).status_code, 400)
+        self.assertEqual(self.client.get(f"{self.url}daily/", {"since": "2024-02-02", "until": "2024-02-01"}).status_code, 400)
+        with self.assertNumQueries(1):
+            self.client.get(f"{self.url}top/products/", {"since": "2024-01-01", "until": "2024-12-31"})
@@ -6,7 +6,9 @@ from .views import (
     CartViewSet,
     OrderViewSet,
     AdminOrderViewSet,
+    SalesReportViewSet,
 )
+from . import async_views
 
 router = DefaultRouter()
 router.register(r"categories", CategoryViewSet, basename="category")
@@ -14,7 +16,18 @@ router.register(r"products", ProductViewSet, basename="product")
 router.register(r"cart", CartViewSet, basename="cart")
 router.register(r"orders", OrderViewSet, basename="order")
 router.register(r"admin/orders", AdminOrderViewSet, basename="admin-orders")
+router.register(r"admin/reports", SalesReportViewSet, basename="admin-reports")
+
+# ASGI-native reads (store.async_views); same payloads as the DRF endpoints above
+async_urlpatterns = [
+    path("categories/", async_views.category_list, name="async-category-list"),
+    path("products/", async_views.product_list, name="async-product-list"),
+    path("products/<int:pk>/", async_views.product_detail, name="async-product-detail"),
+    path("cart/", async_views.cart_detail, name="async-cart-detail"),
+    path("orders/", async_views.order_list, name="async-order-list"),
+]
 
 urlpatterns = [
     path("api/", include(router.urls)),
+    path("async/", include(async_urlpatterns)),
 ]
@@ -1,17 +1,40 @@
 from rest_framework import viewsets, status
 from rest_framework.response import Response
+from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
 from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.db.models import prefetch_related_objects
 from .models import Category, Product, Cart, CartItem, Order, OrderItem
-from drf_yasg import openapi
-from drf_yasg.utils import swagger_auto_schema
+from .pagination import KeysetPagination
+from .inventory import InsufficientStock, apply_product_updates, BULK_UPDATE_MAX_ROWS
+from .fast_serializers import product_values, serialize_products
+from .sparse import parse_paths
+from .carts import get_cart_id, upsert_items, fold_operations, ADD, SET
+from . import search, exports, reservations, changes, analytics
+from .cache import cache_catalog_response
+from .conditional import (
+    conditional,
+    category_list_version,
+    product_list_version,
+    product_detail_version,
+    cart_version,
+)
+from config.api_docs import openapi, swagger_auto_schema
+from core import jobs
+from .tasks import ORDER_CONFIRMATION, SALES_ROLLUP
 
 from .serializers import (
     CategorySerializer,
     ProductSerializer,
     CartSerializer,
-    CartItemSerializer,
+    CartSummarySerializer,
+    CartItemWriteSerializer,
+    CartBulkSerializer,
     OrderSerializer,
+    AdminOrderSerializer,
+    OrderEventSerializer,
 )
 
 # ---------- Swagger Auth Header ----------
@@ -23,6 +46,69 @@ auth_header = openapi.Parameter(
     required=True
 )
 
+# ---------- Swagger Query Params ----------
+summary_param = openapi.Parameter(
+    'summary',
+    openapi.IN_QUERY,
+    description="Return only the cart's item count and total",
+    type=openapi.TYPE_BOOLEAN,
+)
+fields_param = openapi.Parameter(
+    'fields',
+    openapi.IN_QUERY,
+    description="Comma-separated fields to return; dotted paths select nested fields (e.g. id,items.quantity)",
+    type=openapi.TYPE_STRING,
+)
+expand_param = openapi.Parameter(
+    'expand',
+    openapi.IN_QUERY,
+    description="Comma-separated references to expand into full objects (e.g. product)",
+    type=openapi.TYPE_STRING,
+)
+search_param = openapi.Parameter(
+    'q',
+    openapi.IN_QUERY,
+    description="Full-text search over name, description and category; results are ranked by relevance",
+    type=openapi.TYPE_STRING,
+)
+since_param = openapi.Parameter(
+    'since',
+    openapi.IN_QUERY,
+    description="Only orders created at or after this ISO date/datetime",
+    type=openapi.TYPE_STRING,
+)
+until_param = openapi.Parameter(
+    'until',
+    openapi.IN_QUERY,
+    description="Only orders created before this ISO datetime (a bare date includes that whole day)",
+    type=openapi.TYPE_STRING,
+)
+cursor_param = openapi.Parameter(
+    'since',
+    openapi.IN_QUERY,
+    description="Opaque cursor from the previous response's `next`; omit to start from the beginning",
+    type=openapi.TYPE_STRING,
+)
+limit_param = openapi.Parameter(
+    'limit',
+    openapi.IN_QUERY,
+    description="Maximum results per poll (default 100, at most 1000)",
+    type=openapi.TYPE_INTEGER,
+)
+
+
+def cart_data(cart_id, request):
+    """Serialize a cart and its lines (cart row + one prefetch query), honouring ?fields=/?expand=."""
+    context = {"request": request}
+    cart = CartSerializer.setup_eager_loading(Cart.objects.filter(pk=cart_id), context).get()
+    return CartSerializer(cart, context=context).data
+
+
+def insufficient_stock(exc):
+    """400 for a cart change or checkout that asked for more than is available; undoes the transaction."""
+    transaction.set_rollback(True)
+    return Response({"error": "Insufficient stock", "products": exc.product_ids}, status=400)
+
 
 # ---------- CATEGORY ----------
 class CategoryViewSet(viewsets.ModelViewSet):
@@ -31,6 +117,8 @@ class CategoryViewSet(viewsets.ModelViewSet):
     permission_classes = [AllowAny]
 
     @swagger_auto_schema(operation_description="List all categories")
+    @conditional(category_list_version)
+    @cache_catalog_response
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
@@ -44,17 +132,79 @@ class CategoryViewSet(viewsets.ModelViewSet):
 
 # ---------- PRODUCT ----------
 class ProductViewSet(viewsets.ModelViewSet):
-    queryset = Product.objects.filter(is_active=True).order_by("-created_at")
+    queryset = ProductSerializer.setup_eager_loading(
+        Product.objects.filter(is_active=True).order_by("-created_at", "-id")
+    )
     serializer_class = ProductSerializer
+    pagination_class = KeysetPagination
 
     def get_permissions(self):
-        if self.action in ["create", "update", "partial_update", "destroy"]:
+        if self.action in ["create", "update", "partial_update", "destroy", "bulk_update"]:
             return [IsAdminUser()]
-        return [AllowAny]
+        return [AllowAny()]
 
-    @swagger_auto_schema(operation_description="List all active products")
+    @swagger_auto_schema(
+        manual_parameters=[search_param, fields_param],
+        operation_description="List all active products, or search them with ?q="
+    )
+    @conditional(product_list_version)
+    @cache_catalog_response
     def list(self, request, *args, **kwargs):
-        return super().list(request, *args, **kwargs)
+        # reads go through the .values() fast path; output matches ProductSerializer
+        fields = parse_paths(request, "fields")
+        rows = product_values(self.get_queryset(), fields)
+        q = request.query_params.get("q", "").strip()
+        if not q:
+            page = self.paginate_queryset(rows)
+            return self.get_paginated_response(serialize_products(page, request, fields))
+
+        # ranked results don't follow the created_at keyset, so search returns a single page
+        limit = self.paginator.get_page_size(request)
+        products = search.search(rows, q, limit)
+        return Response({"next": None, "previous": None, "results": serialize_products(products, request, fields)})
+
+    @swagger_auto_schema(
+        manual_parameters=[auth_header],
+        operation_description=(
+            "Bulk price/stock sync (Admin only). Body: a list of {id or slug, price?, stock?}. "
+            "Returns one result per row with status updated, unchanged, not_found or invalid; "
+            "only changed values are written."
+        ),
+        request_body=openapi.Schema(
+            type=openapi.TYPE_ARRAY,
+            items=openapi.Schema(
+                type=openapi.TYPE_OBJECT,
+                properties={
+                    "id": openapi.Schema(type=openapi.TYPE_INTEGER),
+                    "slug": openapi.Schema(type=openapi.TYPE_STRING),
+                    "price": openapi.Schema(type=openapi.TYPE_STRING),
+                    "stock": openapi.Schema(type=openapi.TYPE_INTEGER),
+                },
+            ),
+        ),
+        responses={200: "Per-row results", 400: "Body is not a list or is too long"}
+    )
+    @action(detail=False, methods=["post"], url_path="bulk-update")
+    def bulk_update(self, request):
+        rows = request.data
+        if not isinstance(rows, list):
+            return Response({"error": "Expected a list of updates"}, status=400)
+        if len(rows) > BULK_UPDATE_MAX_ROWS:
+            return Response({"error": f"At most {BULK_UPDATE_MAX_ROWS} updates per request"}, status=400)
+
+        results = apply_product_updates(rows)
+        counts = dict.fromkeys(("updated", "unchanged", "not_found", "invalid"), 0)
+        for result in results:
+            counts[result["status"]] += 1
+        return Response({**counts, "results": results})
+
+    @swagger_auto_schema(manual_parameters=[fields_param], operation_description="Retrieve a single active product")
+    @conditional(product_detail_version)
+    @cache_catalog_response
+    def retrieve(self, request, *args, **kwargs):
+        fields = parse_paths(request, "fields")
+        row = get_object_or_404(product_values(self.get_queryset(), fields), pk=kwargs["pk"])
+        return Response(serialize_products([row], request, fields)[0])
 
 
 # ---------- CART ----------
@@ -62,38 +212,44 @@ class CartViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
 
     @swagger_auto_schema(
-        manual_parameters=[auth_header],
-        operation_description="Retrieve logged-in user's cart",
+        manual_parameters=[auth_header, summary_param, fields_param, expand_param],
+        operation_description="Retrieve logged-in user's cart (?summary=1 for item count and total only)",
         responses={200: CartSerializer}
     )
+    @conditional(cart_version)
     def list(self, request):
-        cart, _ = Cart.objects.get_or_create(user=request.user)
-        serializer = CartSerializer(cart)
-        return Response(serializer.data)
+        if request.query_params.get("summary") in ("1", "true"):
+            # header badge: just the denormalized summary, no items
+            cart_id = get_cart_id(request.user, create=False)
+            cart = Cart.objects.only("id", "item_count", "total_price").filter(pk=cart_id).first()
+            return Response(CartSummarySerializer(cart or Cart()).data)
+        return Response(cart_data(get_cart_id(request.user), request))
 
     @swagger_auto_schema(
         manual_parameters=[auth_header],
-        operation_description="Add a product to the cart",
-        request_body=CartItemSerializer,
-        responses={201: CartSerializer, 400: "Invalid data"}
+        operation_description="Add a product to the cart, reserving its stock for a limited time",
+        request_body=CartItemWriteSerializer,
+        responses={201: CartSerializer, 400: "Invalid data or insufficient stock"}
     )
+    @transaction.atomic
     def create(self, request):
-        cart, _ = Cart.objects.get_or_create(user=request.user)
-        serializer = CartItemSerializer(data=request.data)
+        serializer = CartItemWriteSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        product = serializer.validated_data["product"]
+        product_id = serializer.validated_data["product_id"]
         quantity = serializer.validated_data["quantity"]
 
-        item, created = CartItem.objects.get_or_create(
-            cart=cart,
-            product=product,
-            defaults={"price": product.price, "quantity": quantity},
-        )
-        if not created:
-            item.quantity += quantity
-            item.save()
+        cart_id = get_cart_id(request.user)
+        if not upsert_items(cart_id, {product_id: quantity}):
+            return Response(
+                {"product_id": [f'Invalid pk "{product_id}" - object does not exist.']}, status=400
+            )
+        try:
+            reservations.sync(cart_id, [product_id])
+        except InsufficientStock as exc:
+            return insufficient_stock(exc)
+        Cart.update_summary(cart_id)
 
-        return Response(CartSerializer(cart).data, status=status.HTTP_201_CREATED)
+        return Response(cart_data(cart_id, request), status=status.HTTP_201_CREATED)
 
     @swagger_auto_schema(
         manual_parameters=[auth_header],
@@ -102,38 +258,84 @@ class CartViewSet(viewsets.ViewSet):
             type=openapi.TYPE_OBJECT,
             properties={"quantity": openapi.Schema(type=openapi.TYPE_INTEGER)}
         ),
-        responses={200: CartSerializer, 404: "Item not found"}
+        responses={200: CartSerializer, 400: "Insufficient stock", 404: "Item not found"}
     )
+    @transaction.atomic
     def update(self, request, pk=None):
-        cart, _ = Cart.objects.get_or_create(user=request.user)
-        try:
-            item = cart.items.get(pk=pk)
-        except CartItem.DoesNotExist:
+        cart_id = get_cart_id(request.user)
+        items = CartItem.objects.filter(pk=pk, cart_id=cart_id)
+        product_id = items.values_list("product_id", flat=True).first()
+        if product_id is None:
             return Response({"error": "Item not found"}, status=404)
 
         quantity = request.data.get("quantity")
         if quantity and int(quantity) > 0:
-            item.quantity = int(quantity)
-            item.save()
+            items.update(quantity=int(quantity))
         else:
-            item.delete()
+            items.delete()
+        try:
+            reservations.sync(cart_id, [product_id])
+        except InsufficientStock as exc:
+            return insufficient_stock(exc)
+        Cart.update_summary(cart_id)
 
-        return Response(CartSerializer(cart).data)
+        return Response(cart_data(cart_id, request))
 
     @swagger_auto_schema(
         manual_parameters=[auth_header],
         operation_description="Remove a product from the cart",
         responses={200: CartSerializer, 404: "Item not found"}
     )
+    @transaction.atomic
     def destroy(self, request, pk=None):
-        cart, _ = Cart.objects.get_or_create(user=request.user)
-        try:
-            item = cart.items.get(pk=pk)
-            item.delete()
-        except CartItem.DoesNotExist:
+        cart_id = get_cart_id(request.user)
+        items = CartItem.objects.filter(pk=pk, cart_id=cart_id)
+        product_id = items.values_list("product_id", flat=True).first()
+        if product_id is None:
             return Response({"error": "Item not found"}, status=404)
+        items.delete()
+        reservations.release(cart_id, [product_id])
+        Cart.update_summary(cart_id)
+
+        return Response(cart_data(cart_id, request))
+
+    @swagger_auto_schema(
+        manual_parameters=[auth_header],
+        operation_description=(
+            "Apply many cart operations at once. Each operation is "
+            "{product_id, quantity, action} where action is add (default), set or remove; "
+            "operations are applied in order and either all succeed or none do."
+        ),
+        request_body=CartBulkSerializer,
+        responses={200: CartSerializer, 400: "Invalid data, unknown products or insufficient stock"}
+    )
+    @action(detail=False, methods=["post"], url_path="bulk")
+    @transaction.atomic
+    def bulk(self, request):
+        serializer = CartBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        adds, sets, removals = fold_operations(serializer.validated_data["operations"])
+
+        # every product id is checked with one query before anything is written
+        wanted = set(adds) | set(sets)
+        found = set(Product.objects.filter(pk__in=wanted).values_list("pk", flat=True))
+        if wanted - found:
+            return Response(
+                {"error": "Unknown products", "products": sorted(wanted - found)}, status=400
+            )
+
+        cart_id = get_cart_id(request.user)
+        if removals:
+            CartItem.objects.filter(cart_id=cart_id, product_id__in=removals).delete()
+        upsert_items(cart_id, sets, mode=SET)
+        upsert_items(cart_id, adds, mode=ADD)
+        try:
+            reservations.sync(cart_id, [*removals, *sets, *adds])
+        except InsufficientStock as exc:
+            return insufficient_stock(exc)
+        Cart.update_summary(cart_id)
 
-        return Response(CartSerializer(cart).data)
+        return Response(cart_data(cart_id, request))
 
 
 # ---------- ORDER ----------
@@ -141,13 +343,16 @@ class OrderViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
 
     @swagger_auto_schema(
-        manual_parameters=[auth_header],
+        manual_parameters=[auth_header, fields_param, expand_param],
         operation_description="List all orders of the logged-in user",
         responses={200: OrderSerializer(many=True)}
     )
     def list(self, request):
-        orders = Order.objects.filter(user=request.user).order_by("-created_at")
-        return Response(OrderSerializer(orders, many=True).data)
+        context = {"request": request}
+        orders = OrderSerializer.setup_eager_loading(
+            Order.objects.filter(user=request.user).order_by("-created_at"), context
+        )
+        return Response(OrderSerializer(orders, many=True, context=context).data)
 
     @swagger_auto_schema(
         manual_parameters=[auth_header],
@@ -164,48 +369,142 @@ class OrderViewSet(viewsets.ViewSet):
     )
     @transaction.atomic
     def create(self, request):
-        cart = Cart.objects.filter(user=request.user).first()
-        if not cart or not cart.items.exists():
+        cart_id = get_cart_id(request.user, create=False)
+        # lock the lines so a concurrent cart change waits for the order instead of being lost
+        cart_items = CartItem.objects.select_for_update().filter(cart_id=cart_id)
+        lines = list(cart_items.values_list("product_id", "quantity", "price")) if cart_id else []
+        if not lines:
             return Response({"error": "Cart is empty"}, status=400)
 
+        # one conditional UPDATE for all lines, consuming the cart's reservations;
+        # rejects the whole checkout if any line is short
+        quantities = {product_id: quantity for product_id, quantity, _ in lines}
+        try:
+            reservations.convert(cart_id, quantities)
+        except InsufficientStock as exc:
+            return insufficient_stock(exc)
+
         # ⚡ status force karna (user input ignore)
         order = Order.objects.create(
             user=request.user,
             shipping_address=request.data.get("shipping_address", ""),
             phone=request.data.get("phone", ""),
             status="PENDING",  # 👈 force default PENDING
+            total_price=sum(price * quantity for _, quantity, price in lines),
         )
+        OrderItem.objects.bulk_create(
+            OrderItem(order=order, product_id=product_id, quantity=quantity, price=price)
+            for product_id, quantity, price in lines
+        )
+        # only the lines ordered; one added since the read stays in the cart
+        CartItem.objects.filter(cart_id=cart_id, product_id__in=quantities.keys()).delete()
+        Cart.update_summary(cart_id)
+        # slow follow-ups run on the job workers; the jobs commit with the order
+        jobs.enqueue(ORDER_CONFIRMATION, {"order_id": order.pk})
+        jobs.enqueue(SALES_ROLLUP, {"order_id": order.pk})
 
-        for item in cart.items.all():
-            OrderItem.objects.create(
-                order=order,
-                product=item.product,
-                quantity=item.quantity,
-                price=item.price,
-            )
-            item.product.stock -= item.quantity
-            item.product.save()
-
-        order.calculate_total()
-        cart.items.all().delete()
-
-        return Response(OrderSerializer(order).data, status=201)
+        context = {"request": request}
+        prefetch_related_objects([order], OrderSerializer.items_prefetch(context))
+        return Response(OrderSerializer(order, context=context).data, status=201)
 
 
 
 # ---------- ADMIN ORDER MANAGEMENT ----------
 class AdminOrderViewSet(viewsets.ModelViewSet):
-    queryset = Order.objects.all().order_by("-created_at")
+    queryset = Order.objects.all().order_by("-created_at", "-id")
     serializer_class = OrderSerializer
     permission_classes = [IsAdminUser]
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        return OrderSerializer.setup_eager_loading(super().get_queryset(), self.get_serializer_context())
 
     @swagger_auto_schema(
-        manual_parameters=[auth_header],
+        manual_parameters=[auth_header, fields_param, expand_param],
         operation_description="List all orders (Admin only)"
     )
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    @swagger_auto_schema(
+        manual_parameters=[auth_header, since_param, until_param],
+        operation_description=(
+            "Stream all orders as CSV (one row per line item) or JSONL (one order per line, "
+            "items nested) (Admin only)"
+        ),
+        responses={200: "CSV or JSONL file", 400: "Invalid date range"}
+    )
+    @action(detail=False, methods=["get"], url_path=r"export/(?P<fmt>csv|jsonl)")
+    def export(self, request, fmt=None):
+        try:
+            since, until = (
+                exports.parse_bound(request.query_params[name], end=name == "until")
+                if request.query_params.get(name) else None
+                for name in ("since", "until")
+            )
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=400)
+
+        response = StreamingHttpResponse(
+            exports.export_lines(fmt, since, until), content_type=exports.CONTENT_TYPES[fmt]
+        )
+        response["Content-Disposition"] = f'attachment; filename="orders.{fmt}"'
+        return response
+
+    @swagger_auto_schema(
+        manual_parameters=[auth_header, cursor_param, limit_param, fields_param, expand_param],
+        operation_description=(
+            "Orders created or updated since the cursor, oldest change first (Admin only). "
+            "Store `next` and send it as `since` on the next poll; keep paging while `has_more`."
+        ),
+        responses={200: "{results, next, has_more}", 400: "Invalid cursor"}
+    )
+    @action(detail=False, methods=["get"], url_path="changes")
+    def changes(self, request):
+        try:
+            orders, cursor, has_more = changes.order_changes(
+                self.get_queryset().order_by(),
+                request.query_params.get("since"),
+                request.query_params.get("limit"),
+            )
+        except ValueError:
+            return Response({"error": "Invalid cursor or limit"}, status=400)
+        data = OrderSerializer(orders, many=True, context=self.get_serializer_context()).data
+        return Response({"results": data, "next": cursor, "has_more": has_more})
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            auth_header, cursor_param, limit_param,
+            openapi.Parameter('order', openapi.IN_QUERY, description="Only this order's events", type=openapi.TYPE_INTEGER),
+        ],
+        operation_description="Order status transitions since the cursor, in log order (Admin only)",
+        responses={200: "{results, next, has_more}", 400: "Invalid cursor"}
+    )
+    @action(detail=False, methods=["get"], url_path="events")
+    def events(self, request):
+        order_id = request.query_params.get("order")
+        try:
+            events, cursor, has_more = changes.order_events(
+                request.query_params.get("since"),
+                request.query_params.get("limit"),
+                int(order_id) if order_id else None,
+            )
+        except ValueError:
+            return Response({"error": "Invalid cursor, limit or order"}, status=400)
+        return Response({
+            "results": OrderEventSerializer(events, many=True).data, "next": cursor, "has_more": has_more,
+        })
+
+    def get_serializer_class(self):
+        if self.action in ("update", "partial_update"):
+            return AdminOrderSerializer
+        return super().get_serializer_class()
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        previous = serializer.instance.status
+        changes.record_transition(serializer.save(), previous, self.request.user)
+
     @swagger_auto_schema(
         manual_parameters=[auth_header],
         operation_description="Replace full order details (Admin only)"
@@ -217,10 +516,13 @@ class AdminOrderViewSet(viewsets.ModelViewSet):
         manual_parameters=[auth_header],
         operation_description="Cancel an order (Admin only)"
     )
+    @transaction.atomic
     def destroy(self, request, *args, **kwargs):
         order = self.get_object()
+        previous = order.status
         order.status = "CANCELLED"   # 👈 soft delete instead of hard delete
         order.save()
+        changes.record_transition(order, previous, request.user)
         return Response({"status": "Order cancelled"}, status=200)
 
     @swagger_auto_schema(
@@ -229,3 +531,55 @@ class AdminOrderViewSet(viewsets.ModelViewSet):
     )
     def partial_update(self, request, *args, **kwargs):
         return super().partial_update(request, *args, **kwargs)
+
+
+# ---------- ADMIN SALES REPORTS ----------
+report_since_param = openapi.Parameter(
+    'since', openapi.IN_QUERY, description="First day (YYYY-MM-DD); default 29 days before `until`",
+    type=openapi.TYPE_STRING,
+)
+report_until_param = openapi.Parameter(
+    'until', openapi.IN_QUERY, description="Last day, inclusive (YYYY-MM-DD); default today",
+    type=openapi.TYPE_STRING,
+)
+
+
+class SalesReportViewSet(viewsets.ViewSet):
+    """Sales reports read from the daily rollups (store.analytics), never from raw orders."""
+    permission_classes = [IsAdminUser]
+
+    def date_range(self, request):
+        return analytics.parse_range(request.query_params.get("since"), request.query_params.get("until"))
+
+    @swagger_auto_schema(
+        manual_parameters=[auth_header, report_since_param, report_until_param],
+        operation_description=(
+            "Orders and revenue per day with a per-status breakdown, plus totals (Admin only). "
+            "Orders and revenue exclude cancelled orders."
+        ),
+        responses={200: "{since, until, totals, days}", 400: "Invalid dates"}
+    )
+    @action(detail=False, methods=["get"])
+    def daily(self, request):
+        try:
+            since, until = self.date_range(request)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=400)
+        return Response(analytics.daily_report(since, until))
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            auth_header, report_since_param, report_until_param,
+            openapi.Parameter('limit', openapi.IN_QUERY, description="Default 20, at most 100", type=openapi.TYPE_INTEGER),
+        ],
+        operation_description="Top products or categories by revenue over the date range (Admin only)",
+        responses={200: "{since, until, results}", 400: "Invalid dates"}
+    )
+    @action(detail=False, methods=["get"], url_path=r"top/(?P<dimension>products|categories)")
+    def top(self, request, dimension=None):
+        try:
+            since, until = self.date_range(request)
+            limit = min(int(request.query_params.get("limit", analytics.TOP_LIMIT)), 100)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=400)
+        return Response(analytics.top_report(dimension, since, until, max(limit, 1)))